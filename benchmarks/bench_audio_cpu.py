@@ -0,0 +1,124 @@
+# benchmarks/bench_audio_cpu.py
+"""
+CPU cost of one track played through the current PCM path vs. cached Opus passthrough.
+
+    python -m benchmarks.bench_audio_cpu [--seconds 120]
+
+Needs ffmpeg on PATH. The PCM path includes discord.py's Opus encode when libopus can be loaded
+(it is what the voice player does for non-Opus sources); otherwise only the ffmpeg decode side is measured.
+Frames are read as fast as possible, so the numbers are CPU per track, not wall time.
+"""
+import argparse
+import asyncio
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import discord
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils.audio_cache import OpusCache  # noqa: E402
+
+VOLUME = 0.5  # YTDLSource default
+
+
+def cpu_now():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    kids = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime, kids.ru_utime + kids.ru_stime
+
+
+def drain(source, encoder=None):
+    frames = 0
+    while True:
+        data = source.read()
+        if not data:
+            break
+        if encoder is not None:
+            encoder.encode(data, encoder.SAMPLES_PER_FRAME)
+        frames += 1
+    source.cleanup()  # reaps ffmpeg so its CPU shows up in RUSAGE_CHILDREN
+    return frames
+
+
+def measure(label, build, encoder=None):
+    own0, kids0 = cpu_now()
+    start = time.perf_counter()
+    frames = drain(build(), encoder)
+    wall = time.perf_counter() - start
+    own1, kids1 = cpu_now()
+    return label, frames, own1 - own0, kids1 - kids0, wall
+
+
+def make_input(path: Path, seconds: int):
+    # opus-in-webm, like most YouTube bestaudio formats
+    subprocess.run(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+         "-ac", "2", "-ar", "48000", "-c:a", "libopus", "-b:a", "128k", "-y", str(path)],
+        check=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=int, default=120, help="length of the synthetic track")
+    args = parser.parse_args()
+
+    if not shutil.which("ffmpeg"):
+        sys.exit("ffmpeg not found on PATH")
+
+    encoder = None
+    try:
+        if not discord.opus.is_loaded():
+            discord.opus._load_default()
+        if discord.opus.is_loaded():
+            encoder = discord.opus.Encoder()
+    except Exception:
+        encoder = None
+    if encoder is None:
+        print("libopus not loadable: PCM path excludes the Python-side Opus encode (real cost is higher).")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        track = tmp / "track.webm"
+        make_input(track, args.seconds)
+
+        cache = OpusCache(cache_dir=str(tmp / "cache"), volume=VOLUME)
+        own0, kids0 = cpu_now()
+        asyncio.run(cache._transcode("bench", str(track)))
+        own1, kids1 = cpu_now()
+        cached = cache._path("bench")
+        if not cached.exists():
+            sys.exit("transcode failed")
+        transcode_cpu = (own1 - own0) + (kids1 - kids0)
+
+        results = [
+            measure(
+                "current: FFmpegPCMAudio + volume + encode",
+                lambda: discord.PCMVolumeTransformer(discord.FFmpegPCMAudio(str(track), options="-vn"), VOLUME),
+                encoder,
+            ),
+            measure(
+                "cached: FFmpegOpusAudio passthrough",
+                lambda: discord.FFmpegOpusAudio(str(cached), codec="copy"),
+            ),
+        ]
+
+    minutes = args.seconds / 60
+    print(f"\ntrack length: {args.seconds}s   one-off transcode into cache: {transcode_cpu:.2f}s CPU\n")
+    print(f"{'path':<44} {'frames':>7} {'bot cpu':>8} {'ffmpeg':>8} {'cpu/min':>8} {'wall':>7}")
+    for label, frames, own, kids, wall in results:
+        print(f"{label:<44} {frames:>7} {own:>7.2f}s {kids:>7.2f}s {(own + kids) / minutes:>7.2f}s {wall:>6.2f}s")
+    base = results[0][2] + results[0][3]
+    cached_cpu = results[1][2] + results[1][3]
+    if cached_cpu > 0:
+        print(f"\npassthrough uses {base / cached_cpu:.1f}x less CPU per play; "
+              f"the cache pays for itself after {transcode_cpu / max(base - cached_cpu, 1e-9):.1f} replays")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# benchmarks/bench_events.py
+"""
+Replay synthetic or recorded gateway event streams through the loaded cogs and report throughput,
+per-listener latency percentiles and allocations. Runs fully offline:
+
+    python -m benchmarks.bench_events                       # every built-in scenario
+    python -m benchmarks.bench_events --scenario raid --events 5000
+    python -m benchmarks.bench_events --record chat.jsonl   # save the generated stream
+    python -m benchmarks.bench_events --replay chat.jsonl   # replay a recorded stream
+
+Stream records are JSON lines: {"event": "message", "content": "...", "channel": "text"|"news",
+"mentions": 0, "mention_bot": false, "author": 3} or {"event": "member_join", "author": 7}.
+
+Listeners are awaited one after another, like discord.py would run them if each were the only handler, so
+latencies are per listener. Artificial `asyncio.sleep` delays in the cogs (typing effects) are skipped unless
+--real-sleeps is given. Allocations are measured in a second pass under tracemalloc.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from collections import defaultdict
+
+from benchmarks.gateway_fakes import build_bot, drain_background
+
+EXTENSIONS = (
+    "cogs.moderation",
+    "cogs.mention_response",
+    "cogs.autoresponder",
+    "cogs.smart_autoresponder",
+)
+
+WORDS = ("build", "script", "lua", "part", "studio", "tween", "model", "gui", "map", "roblox", "help", "bug")
+
+
+# --- generated streams ---
+def chat_burst(n: int, rng: random.Random):
+    for _ in range(n):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 20)))
+        if rng.random() < 0.05:
+            text += " lagoona"
+        yield {"event": "message", "content": text, "author": rng.randint(0, 300)}
+
+
+def raid(n: int, rng: random.Random):
+    for i in range(n):
+        yield {"event": "member_join", "author": 100_000 + i}
+
+
+def spam_wave(n: int, rng: random.Random):
+    for i in range(n):
+        kind = i % 3
+        if kind == 0:
+            yield {"event": "message", "content": "free robux badword1 click", "author": rng.randint(0, 20)}
+        elif kind == 1:
+            yield {"event": "message", "content": "look", "mentions": 8, "author": rng.randint(0, 20)}
+        else:
+            yield {"event": "message", "content": "spam spam spam " * 10, "author": rng.randint(0, 20)}
+
+
+def mention_storm(n: int, rng: random.Random):
+    for _ in range(n):
+        yield {"event": "message", "content": "hey <@bot> how do I tween a part?", "mention_bot": True,
+               "author": rng.randint(0, 500)}
+
+
+def news_posts(n: int, rng: random.Random):
+    for i in range(n):
+        yield {"event": "message", "channel": "news", "content": f"Update #{i}", "author": 1}
+
+
+SCENARIOS = {
+    "chat": chat_burst,
+    "raid": raid,
+    "spam": spam_wave,
+    "mentions": mention_storm,
+    "news": news_posts,
+}
+
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def listener_name(fn) -> str:
+    owner = getattr(fn, "__self__", None)
+    return f"{type(owner).__name__}.{fn.__name__}" if owner is not None else fn.__qualname__
+
+
+async def replay(scenario, records, *, measure_alloc: bool = False):
+    bot = scenario.bot
+    latencies = defaultdict(list)
+    allocs = defaultdict(list)
+    handlers = {
+        "message": bot.extra_events.get("on_message", []),
+        "member_join": bot.extra_events.get("on_member_join", []),
+    }
+
+    started = time.perf_counter()
+    for record in records:
+        kind = record["event"]
+        arg = scenario.message(record) if kind == "message" else scenario.member(record)
+        for fn in handlers.get(kind, ()):
+            name = listener_name(fn)
+            before = tracemalloc.get_traced_memory()[0] if measure_alloc else 0
+            t0 = time.perf_counter()
+            try:
+                await fn(arg)
+            except Exception as e:  # a crashing listener is a finding, not a reason to stop the run
+                latencies[f"{name} (error: {type(e).__name__})"].append(time.perf_counter() - t0)
+                continue
+            latencies[name].append(time.perf_counter() - t0)
+            if measure_alloc:
+                allocs[name].append(tracemalloc.get_traced_memory()[0] - before)
+    await drain_background(bot)
+    elapsed = time.perf_counter() - started
+    return elapsed, latencies, allocs
+
+
+def report(name: str, count: int, elapsed: float, latencies, allocs, peak: int, http_calls):
+    print(f"\n=== {name}: {count} events in {elapsed:.2f}s -> {count / elapsed:,.0f} events/s ===")
+    print(f"{'listener':<44} {'calls':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'net KB':>8}")
+    for listener, values in sorted(latencies.items()):
+        ordered = sorted(values)
+        kb = statistics.mean(allocs[listener]) / 1024 if allocs.get(listener) else float("nan")
+        print(f"{listener:<44} {len(values):>7} {percentile(ordered, 50) * 1e3:>8.3f} {percentile(ordered, 95) * 1e3:>8.3f} "
+              f"{percentile(ordered, 99) * 1e3:>8.3f} {ordered[-1] * 1e3:>8.3f} {kb:>8.1f}")
+    print(f"peak traced memory during alloc pass: {peak / 1e6:.1f} MB")
+    if http_calls:
+        print("REST calls: " + ", ".join(f"{route} x{n}" for route, n in http_calls.most_common(6)))
+
+
+async def run_scenario(name: str, records, args):
+    real_sleep = asyncio.sleep
+    if not args.real_sleeps:
+        async def fast_sleep(delay, result=None):
+            return await real_sleep(0, result)
+        asyncio.sleep = fast_sleep
+    try:
+        scenario = await build_bot(EXTENSIONS, latency=args.http_latency)
+        # timing pass
+        elapsed, latencies, _ = await replay(scenario, records)
+        http_calls = scenario.http.calls.copy()
+        await scenario.bot.close()
+
+        # allocation pass on a fresh bot so caches start cold again
+        scenario = await build_bot(EXTENSIONS, latency=args.http_latency)
+        gc.collect()
+        tracemalloc.start()
+        _, _, allocs = await replay(scenario, records, measure_alloc=True)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        await scenario.bot.close()
+    finally:
+        asyncio.sleep = real_sleep
+
+    report(name, len(records), elapsed, latencies, allocs, peak, http_calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append",
+                        help="scenario to run (repeatable); default: all")
+    parser.add_argument("--events", type=int, default=2000, help="events per generated scenario")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--replay", metavar="FILE", help="replay a recorded JSONL stream instead of generating one")
+    parser.add_argument("--record", metavar="FILE", help="write the generated stream(s) to FILE as JSONL")
+    parser.add_argument("--http-latency", type=float, default=0.0, help="simulated REST latency in seconds")
+    parser.add_argument("--real-sleeps", action="store_true", help="keep the cogs' asyncio.sleep delays")
+    args = parser.parse_args()
+
+    if args.replay:
+        with open(args.replay, encoding="utf-8") as fh:
+            streams = {args.replay: [json.loads(line) for line in fh if line.strip()]}
+    else:
+        rng = random.Random(args.seed)
+        streams = {name: list(SCENARIOS[name](args.events, rng)) for name in (args.scenario or SCENARIOS)}
+
+    if args.record:
+        with open(args.record, "w", encoding="utf-8") as fh:
+            for records in streams.values():
+                for record in records:
+                    fh.write(json.dumps(record) + "\n")
+
+    for name, records in streams.items():
+        asyncio.run(run_scenario(name, records, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# benchmarks/bench_member_cache.py
+"""
+Memory and startup cost of each MEMBER_CACHE strategy on a synthetic large guild.
+
+    python -m benchmarks.bench_member_cache [--members 100000] [--lookups 200]
+
+Runs offline: members are built from gateway-shaped payloads through discord.py's own Guild/Member classes,
+the same way GUILD_MEMBERS_CHUNK handling does, so no token or network is needed.
+  full  -> every member is materialised at startup (chunk_guilds_at_startup)
+  lazy  -> nothing at startup; single members are fetched on demand into the resolver's LRU, and a name
+           search (what /check_alt does) is an uncached gateway member query, so nothing stays in memory
+  none  -> like lazy, but name searches aren't allowed
+"""
+import argparse
+import asyncio
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import discord
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils.member_cache import MemberResolver, client_options  # noqa: E402
+
+GUILD_ID = 1_000_000_000_000_000_000
+CHUNK_SIZE = 1000  # members per GUILD_MEMBERS_CHUNK event
+
+
+def member_payload(i: int) -> dict:
+    return {
+        "user": {
+            "id": str(GUILD_ID + 1 + i),
+            "username": f"lagoonafan{i}",
+            "global_name": f"Lagoona Fan {i}",
+            "discriminator": "0",
+            "avatar": "a" * 32 if i % 3 else None,
+        },
+        "nick": f"fan {i}" if i % 5 == 0 else None,
+        "roles": [str(GUILD_ID + 10 + (i % 4))] if i % 2 else [],
+        "joined_at": "2024-05-01T12:00:00.000000+00:00",
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+
+def make_guild(state, member_count: int) -> discord.Guild:
+    role = {"id": str(GUILD_ID), "name": "@everyone", "permissions": "0", "position": 0, "color": 0,
+            "hoist": False, "managed": False, "mentionable": False}
+    data = {"id": str(GUILD_ID), "name": "Synthetic", "member_count": member_count, "members": [],
+            "channels": [], "roles": [role], "emojis": [], "stickers": [], "features": [],
+            "owner_id": str(GUILD_ID + 1), "verification_level": 0, "default_message_notifications": 0,
+            "explicit_content_filter": 0, "mfa_level": 0, "premium_tier": 0, "nsfw_level": 0,
+            "preferred_locale": "en-US", "max_members": 500000}
+    guild = discord.Guild(data=data, state=state)
+    state._add_guild(guild)
+    return guild
+
+
+def chunk_into(guild, state, member_count: int):
+    """What a cache=True chunk request does with each GUILD_MEMBERS_CHUNK."""
+    for start in range(0, member_count, CHUNK_SIZE):
+        batch = [member_payload(i) for i in range(start, min(start + CHUNK_SIZE, member_count))]
+        for data in batch:
+            guild._add_member(discord.Member(data=data, guild=guild, state=state))
+
+
+class _OfflineGuild:
+    """Wraps the synthetic guild so REST fetch_member and gateway query_members() are answered locally."""
+
+    def __init__(self, guild, state, member_count: int):
+        self._guild, self._state = guild, state
+        self._member_count = member_count
+        self.id = guild.id
+        self.member_count = guild.member_count
+
+    @property
+    def chunked(self):
+        return self._guild.chunked
+
+    @property
+    def members(self):
+        return self._guild.members
+
+    def get_member(self, user_id):
+        return self._guild.get_member(user_id)
+
+    async def fetch_member(self, user_id):
+        return discord.Member(data=member_payload(user_id - GUILD_ID - 1), guild=self._guild, state=self._state)
+
+    async def query_members(self, query: str, *, limit: int = 5, cache: bool = True):
+        # the synthetic usernames all start with "lagoonafan", so every member matches
+        found = [discord.Member(data=member_payload(i), guild=self._guild, state=self._state)
+                 for i in range(min(limit, self._member_count))]
+        if cache:
+            for member in found:
+                self._guild._add_member(member)
+        return found
+
+
+def run(mode: str, members: int, lookups: int) -> dict:
+    client = discord.Client(intents=discord.Intents.default() | discord.Intents(members=True), **client_options(mode))
+    state = client._connection
+
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+
+    guild = make_guild(state, members)
+    if state._chunk_guilds:
+        chunk_into(guild, state, members)
+    startup = time.perf_counter() - started
+    gc.collect()
+    after_startup = tracemalloc.get_traced_memory()[0] - base
+
+    resolver = MemberResolver(client, mode=mode)
+    fetch_guild = _OfflineGuild(guild, state, members)
+    started = time.perf_counter()
+
+    async def lookups_coro():
+        for i in range(lookups):
+            await resolver.get_member(fetch_guild, GUILD_ID + 1 + (i * 7919) % members)
+
+    asyncio.run(lookups_coro())
+    lookup_time = time.perf_counter() - started
+
+    # a /check_alt similar-names search, as the bot does it
+    started = time.perf_counter()
+    found = asyncio.run(resolver.search_members(fetch_guild, "lago"))
+    search = time.perf_counter() - started if found is not None else None
+    del found
+
+    gc.collect()
+    after_use = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return {
+        "mode": mode,
+        "startup_s": startup,
+        "startup_mb": after_startup / 1e6,
+        "lookups_s": lookup_time,
+        "rest_fetches": resolver.fetches,
+        "search_s": search,
+        "after_use_mb": after_use / 1e6,
+        "cached": len(guild.members),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=200, help="single-member lookups after startup")
+    args = parser.parse_args()
+
+    print(f"synthetic guild: {args.members} members, {args.lookups} lookups\n")
+    print(f"{'mode':<6} {'startup':>9} {'startup mem':>12} {'lookups':>9} {'REST':>6} {'search':>10} {'mem after':>10} {'cached':>8}")
+    for mode in ("full", "lazy", "none"):
+        r = run(mode, args.members, args.lookups)
+        search = f"{r['search_s']:.3f}s" if r["search_s"] is not None else "-"
+        print(f"{r['mode']:<6} {r['startup_s']:>8.2f}s {r['startup_mb']:>10.1f}MB {r['lookups_s']:>8.3f}s "
+              f"{r['rest_fetches']:>6} {search:>10} {r['after_use_mb']:>8.1f}MB {r['cached']:>8}")
+    print("\nlazy/none 'mem after' is only the resolver's LRU of fetched members; searches cache nothing.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# benchmarks/gateway_fakes.py
+"""
+Offline stand-ins for the Discord gateway and REST API, used by the event-replay benchmarks.
+
+Messages, members and channels are real discord.py objects built from gateway-shaped payloads, so the cogs'
+hot paths run unmodified. Only the HTTP layer is replaced: every REST call is answered locally and counted.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import discord
+from discord.http import Route
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+GUILD_ID = 900_000_000_000_000_000
+BOT_ID = GUILD_ID + 1
+TEXT_CHANNEL_ID = GUILD_ID + 10
+NEWS_CHANNEL_ID = GUILD_ID + 11
+FIRST_USER_ID = GUILD_ID + 1000
+
+_snowflakes = itertools.count(GUILD_ID + 10_000_000)
+
+
+def user_payload(user_id: int, name: str = None, bot: bool = False) -> dict:
+    return {
+        "id": str(user_id),
+        "username": name or f"user{user_id - FIRST_USER_ID}",
+        "global_name": None,
+        "discriminator": "0",
+        "avatar": None,
+        "bot": bot,
+    }
+
+
+def member_payload(user_id: int, name: str = None) -> dict:
+    return {
+        "user": user_payload(user_id, name),
+        "nick": None,
+        "roles": [],
+        "joined_at": "2024-05-01T12:00:00.000000+00:00",
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+
+def message_payload(channel_id: int, author_id: int, content: str, mention_ids=()) -> dict:
+    mentions = []
+    for uid in mention_ids:
+        mentioned = user_payload(uid, "Lagoona" if uid == BOT_ID else None, bot=uid == BOT_ID)
+        mentioned["member"] = {k: v for k, v in member_payload(uid).items() if k != "user"}
+        mentions.append(mentioned)
+    return {
+        "id": str(next(_snowflakes)),
+        "channel_id": str(channel_id),
+        "guild_id": str(GUILD_ID),
+        "author": user_payload(author_id),
+        "member": {k: v for k, v in member_payload(author_id).items() if k != "user"},
+        "content": content,
+        "timestamp": "2026-01-01T00:00:00.000000+00:00",
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": mentions,
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0,
+    }
+
+
+def guild_payload() -> dict:
+    everyone = {"id": str(GUILD_ID), "name": "@everyone", "permissions": "1071698660929", "position": 0,
+                "color": 0, "hoist": False, "managed": False, "mentionable": False}
+    channels = [
+        {"id": str(TEXT_CHANNEL_ID), "type": 0, "name": "general", "position": 0, "permission_overwrites": []},
+        {"id": str(NEWS_CHANNEL_ID), "type": 5, "name": "announcements", "position": 1, "permission_overwrites": []},
+    ]
+    return {
+        "id": str(GUILD_ID), "name": "Benchmark Guild", "member_count": 1, "owner_id": str(FIRST_USER_ID),
+        "members": [member_payload(BOT_ID, "Lagoona")], "channels": channels, "roles": [everyone],
+        "emojis": [], "stickers": [], "features": [], "verification_level": 0,
+        "default_message_notifications": 0, "explicit_content_filter": 0, "mfa_level": 0,
+        "premium_tier": 0, "nsfw_level": 0, "preferred_locale": "en-US", "max_members": 500000,
+    }
+
+
+class FakeHTTP:
+    """Replaces HTTPClient.request: answers every route locally after `latency` seconds and counts calls."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = Counter()
+
+    async def request(self, route: Route, *, files=None, form=None, **kwargs):
+        self.calls[f"{route.method} {route.path}"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if route.method == "POST" and route.path.endswith("/messages"):
+            payload = kwargs.get("json") or {}
+            channel_id = route.channel_id or TEXT_CHANNEL_ID
+            data = message_payload(channel_id, BOT_ID, payload.get("content") or "")
+            data["author"] = user_payload(BOT_ID, "Lagoona", bot=True)
+            data["embeds"] = payload.get("embeds") or []
+            return data
+        return None
+
+
+class Scenario:
+    """The bot under test, its fake guild and helpers to turn event records into discord.py objects."""
+
+    def __init__(self, bot, http: FakeHTTP):
+        self.bot = bot
+        self.http = http
+        state = bot._connection
+        self.state = state
+        self.guild = discord.Guild(data=guild_payload(), state=state)
+        state._add_guild(self.guild)
+        self.text = self.guild.get_channel(TEXT_CHANNEL_ID)
+        self.news = self.guild.get_channel(NEWS_CHANNEL_ID)
+
+    def message(self, record: dict) -> discord.Message:
+        channel = self.news if record.get("channel") == "news" else self.text
+        mention_ids = [FIRST_USER_ID + 500_000 + i for i in range(record.get("mentions", 0))]
+        if record.get("mention_bot"):
+            mention_ids.append(BOT_ID)
+        data = message_payload(channel.id, FIRST_USER_ID + record.get("author", 0), record.get("content", ""), mention_ids)
+        return discord.Message(state=self.state, channel=channel, data=data)
+
+    def member(self, record: dict) -> discord.Member:
+        return discord.Member(data=member_payload(FIRST_USER_ID + record.get("author", 0)), guild=self.guild, state=self.state)
+
+
+async def build_bot(extensions, latency: float = 0.0):
+    """A LagoonaBot with the given cogs loaded and REST stubbed out; never connects to Discord."""
+    # keep LLM calls offline: with no keys the helpers return immediately
+    for key in ("GEMINI_API_KEY", "CHATGPT_API_KEY"):
+        os.environ.pop(key, None)
+    os.environ.setdefault("MEMBER_CACHE", "lazy")
+
+    import lagoona
+
+    # lagoona sets up JSON logging to stderr at import; keep the cogs' warnings out of the report tables
+    logging.getLogger().setLevel(logging.ERROR)
+
+    bot = lagoona.LagoonaBot()
+    await bot._async_setup_hook()
+    http = FakeHTTP(latency)
+    bot.http.request = http.request
+    bot._connection.user = discord.ClientUser(state=bot._connection, data=user_payload(BOT_ID, "Lagoona", bot=True))
+    for ext in extensions:
+        await bot.load_extension(ext)
+    return Scenario(bot, http)
+
+
+async def drain_background(bot, timeout: float = 5.0):
+    """Wait for queued outbound actions (reactions/replies/edits) to flush."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        workers = [b.worker for b in bot.outbound._buckets.values() if b.worker and not b.worker.done()]
+        if not workers:
+            return
+        await asyncio.wait(workers, timeout=max(0.0, deadline - time.perf_counter()))
@@ -1,21 +1,26 @@
 # cogs/announcements.py
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands
 import logging
 from utils.image_store import ImageStore
+from utils.scheduler import PostScheduler, ScheduledJob, SCHEDULER_FILE
 import os
-from datetime import time, timedelta
+import time
+from pathlib import Path
 
 logger = logging.getLogger("announcements")
 
+DAILY_JOB_ID = "daily"
+DEFAULT_JITTER = float(os.environ.get("SCHEDULER_JITTER", 30))  # seconds; spreads top-of-the-hour bursts
+
 class AnnouncementsCog(commands.Cog, name="AnnouncementsCog"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         # set base url if you want to use static serving through webserver
         base_url = os.environ.get("STATIC_BASE_URL")  # e.g. https://<render-domain>/static/banners
         self.image_store = bot.image_store if hasattr(bot, "image_store") else ImageStore(static_dir="static/banners", base_url=base_url)
-        self.daily_post_loop.change_interval(seconds=60*60*24)  # default daily interval, can override
+        self.scheduler = self._make_scheduler()
 
     # Example slash command to create a one-off announcement
     @app_commands.command(name="announcement", description="Create an announcement (owner/mod only).")
@@ -72,19 +77,8 @@ class AnnouncementsCog(commands.Cog, name="AnnouncementsCog"):
             return user.guild_permissions.manage_guild
         return False
 
-    # Example daily post loop — replace with your content pipeline
-    @tasks.loop(hours=24.0)
-    async def daily_post_loop(self):
-        # Post a daily message to a configured channel id if present
-        channel_id = os.environ.get("DAILY_POST_CHANNEL_ID")
-        if not channel_id:
-            logger.debug("DAILY_POST_CHANNEL_ID not configured.")
-            return
-        channel = self.bot.get_channel(int(channel_id))
-        if not channel:
-            logger.warning("Daily post channel not found.")
-            return
-        embed = discord.Embed(title="Daily Update", description="Here's a daily post from Lagoona!", color=discord.Color.green())
+    # --- Scheduled posts ---
+    async def _send_with_image(self, channel: discord.abc.Messageable, embed: discord.Embed):
         chosen = self.image_store.pick_attachment()
         if chosen:
             file, filename = chosen
@@ -96,9 +90,123 @@ class AnnouncementsCog(commands.Cog, name="AnnouncementsCog"):
                 embed.set_image(url=url)
             await channel.send(embed=embed)
 
-    @daily_post_loop.before_loop
-    async def before_daily(self):
+    async def _post_scheduled(self, job: ScheduledJob):
         await self.bot.wait_until_ready()
+        channel = self.bot.get_channel(job.channel_id)
+        if not channel:
+            logger.warning("Scheduled post %s: channel %s not found.", job.job_id, job.channel_id)
+            return
+        embed = discord.Embed(title=job.title, description=job.message, color=discord.Color.green())
+        await self._send_with_image(channel, embed)
+
+    def _make_scheduler(self) -> PostScheduler:
+        if getattr(self.bot, "shard_ids", None) is None:
+            return PostScheduler(self._post_scheduled)
+        # Cluster mode: this process only runs jobs for guilds on its shards and keeps them in its own file,
+        # so clusters never fire each other's jobs or overwrite each other's saves
+        base = Path(SCHEDULER_FILE)
+        cluster_id = getattr(self.bot, "cluster_id", 0)
+        return PostScheduler(
+            self._post_scheduled,
+            path=str(base.with_name(f"{base.stem}.cluster{cluster_id}{base.suffix}")),
+            owns=self._owns_job,
+            seed_path=str(base),
+        )
+
+    def _owns_job(self, job: ScheduledJob) -> bool:
+        shard_ids = self.bot.shard_ids
+        return shard_ids is None or (job.guild_id >> 22) % (self.bot.shard_count or 1) in shard_ids
+
+    def start_scheduler(self):
+        """Start the shared post scheduler (called once the bot is ready)."""
+        self.scheduler.start()
+        # Seed the legacy daily post from env so existing deployments keep working
+        channel_id = os.environ.get("DAILY_POST_CHANNEL_ID")
+        if not channel_id:
+            logger.debug("DAILY_POST_CHANNEL_ID not configured.")
+            return
+        if DAILY_JOB_ID in self.scheduler.jobs:
+            return
+        channel = self.bot.get_channel(int(channel_id))
+        if not channel:
+            logger.warning("Daily post channel not found.")
+            return
+        self.scheduler.add(ScheduledJob(
+            guild_id=channel.guild.id,
+            channel_id=channel.id,
+            title="Daily Update",
+            message="Here's a daily post from Lagoona!",
+            cron=os.environ.get("DAILY_POST_CRON", "0 12 * * *"),
+            jitter=DEFAULT_JITTER,
+            job_id=DAILY_JOB_ID,
+        ))
+
+    async def cog_unload(self):
+        await self.scheduler.stop()
+
+    @app_commands.command(name="schedule_post", description="Schedule a one-off or recurring (cron) post (owner/mod only).")
+    @app_commands.describe(
+        channel="Channel to post in",
+        title="Title",
+        message="Message text",
+        cron="Recurring schedule, e.g. '0 9 * * 1' (minute hour day month weekday)",
+        in_minutes="Post once after this many minutes (ignored when cron is set)",
+        timezone="Timezone for the cron schedule, e.g. Europe/London",
+        catch_up="What to do with runs missed while offline: skip, once or all",
+    )
+    async def schedule_post(self, interaction: discord.Interaction, channel: discord.TextChannel, title: str, message: str,
+                            cron: str = None, in_minutes: int = None, timezone: str = "UTC", catch_up: str = "once"):
+        if not await self._is_owner_or_mod(interaction.user):
+            await interaction.response.send_message("You do not have permission.", ephemeral=True)
+            return
+        if not cron and not in_minutes:
+            await interaction.response.send_message("Provide either `cron` or `in_minutes`.", ephemeral=True)
+            return
+        job = ScheduledJob(
+            guild_id=interaction.guild_id,
+            channel_id=channel.id,
+            title=title,
+            message=message,
+            cron=cron,
+            run_at=None if cron else time.time() + in_minutes * 60,
+            tz=timezone,
+            jitter=DEFAULT_JITTER if cron else 0.0,
+            catch_up=catch_up.lower(),
+        )
+        try:
+            self.scheduler.add(job)
+        except Exception as e:
+            await interaction.response.send_message(f"Could not schedule post: {e}", ephemeral=True)
+            return
+        await interaction.response.send_message(
+            f"Scheduled `{job.job_id}` in {channel.mention}, next run <t:{int(job.next_run)}:f>.", ephemeral=True
+        )
+
+    @app_commands.command(name="scheduled_posts", description="List scheduled posts in this server.")
+    async def scheduled_posts(self, interaction: discord.Interaction):
+        jobs = self.scheduler.jobs_for_guild(interaction.guild_id)
+        if not jobs:
+            await interaction.response.send_message("No scheduled posts.", ephemeral=True)
+            return
+        lines = [
+            f"`{j.job_id}` <#{j.channel_id}> **{j.title}** — {j.cron or 'once'} — next <t:{int(j.next_run)}:R>"
+            for j in jobs[:25]
+        ]
+        if len(jobs) > 25:
+            lines.append(f"…and {len(jobs) - 25} more")
+        await interaction.response.send_message("\n".join(lines), ephemeral=True)
+
+    @app_commands.command(name="unschedule_post", description="Remove a scheduled post (owner/mod only).")
+    @app_commands.describe(job_id="ID shown by /scheduled_posts")
+    async def unschedule_post(self, interaction: discord.Interaction, job_id: str):
+        if not await self._is_owner_or_mod(interaction.user):
+            await interaction.response.send_message("You do not have permission.", ephemeral=True)
+            return
+        job = self.scheduler.jobs.get(job_id)
+        if not job or job.guild_id != interaction.guild_id or not self.scheduler.remove(job_id):
+            await interaction.response.send_message("No scheduled post with that ID.", ephemeral=True)
+            return
+        await interaction.response.send_message(f"Removed scheduled post `{job_id}`.", ephemeral=True)
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(AnnouncementsCog(bot))
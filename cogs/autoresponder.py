@@ -8,6 +8,8 @@ import logging
 import os
 import json
 import re
+from utils.logging_setup import truncate
+from utils.tracing import tracer, traced
 
 logger = logging.getLogger("autoresponder")
 
@@ -15,6 +17,7 @@ logger = logging.getLogger("autoresponder")
 auto_enabled = set()
 
 # --- Helper: call Gemini or ChatGPT API ---
+@traced("llm.call")
 async def call_llm_api(prompt: str) -> str:
     """Send text to Gemini or ChatGPT depending on which key is available."""
     gemini_key = os.environ.get("GEMINI_API_KEY")
@@ -24,6 +27,7 @@ async def call_llm_api(prompt: str) -> str:
         async with aiohttp.ClientSession() as session:
             # --- Gemini ---
             if gemini_key:
+                tracer.current().set_attribute("llm.provider", "gemini")
                 url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent?key={gemini_key}"
                 payload = {"contents": [{"parts": [{"text": prompt}]}]}
                 async with session.post(url, json=payload) as resp:
@@ -38,6 +42,7 @@ async def call_llm_api(prompt: str) -> str:
 
             # --- ChatGPT (OpenAI) ---
             elif openai_key:
+                tracer.current().set_attribute("llm.provider", "openai")
                 url = "https://api.openai.com/v1/chat/completions"
                 headers = {"Authorization": f"Bearer {openai_key}"}
                 payload = {
@@ -60,7 +65,7 @@ async def call_llm_api(prompt: str) -> str:
                     if "choices" in data:
                         return data["choices"][0]["message"]["content"].strip()
                     else:
-                        logger.warning("OpenAI response: %s", data)
+                        logger.warning("OpenAI response: %s", truncate(data))
                         return "I'm having a little trouble thinking right now 🌀"
 
             else:
@@ -94,6 +99,7 @@ class AutoResponder(commands.Cog):
             await interaction.response.send_message("Please use `/autorespond on` or `/autorespond off`.", ephemeral=True)
 
     @commands.Cog.listener()
+    @traced("autoresponder.on_message")
     async def on_message(self, message: discord.Message):
         # Ignore bots & DMs
         if message.author.bot or not message.guild:
@@ -115,9 +121,11 @@ class AutoResponder(commands.Cog):
         text = re.sub(r"<@!?(\d+)>", "", message.content).strip()
 
         # Create typing effect & call LLM
-        async with message.channel.typing():
-            reply = await call_llm_api(text)
-            await asyncio.sleep(0.5)
+        with tracer.span("discord.typing"):
+            async with message.channel.typing():
+                reply = await call_llm_api(text)
+                with tracer.span("delay", **{"delay.seconds": 0.5}):
+                    await asyncio.sleep(0.5)
 
         # Send reply tagging user
         try:
@@ -3,6 +3,7 @@ import discord
 from discord.ext import commands
 import random
 import asyncio
+from utils.tracing import tracer, traced
 
 RESPONSES = [
     "Hey there! 🌊",
@@ -19,13 +20,16 @@ class MentionResponder(commands.Cog):
         self.bot = bot
 
     @commands.Cog.listener()
+    @traced("mention_response.on_message")
     async def on_message(self, message: discord.Message):
         # ignore bots or DMs
         if not message.guild or message.author.bot:
             return
         if self.bot.user.mentioned_in(message):
-            async with message.channel.typing():
-                await asyncio.sleep(0.5)
+            with tracer.span("discord.typing"):
+                async with message.channel.typing():
+                    with tracer.span("delay", **{"delay.seconds": 0.5}):
+                        await asyncio.sleep(0.5)
             response = random.choice(RESPONSES)
             await message.channel.send(f"{message.author.mention} {response}")
 
@@ -5,21 +5,31 @@ from discord import app_commands
 import asyncio
 import logging
 import re
-from datetime import datetime, timedelta
+from datetime import timedelta
+from utils.shared_state import LocalState
+from utils.member_cache import MemberResolver
+from utils.tracing import traced
 
 logger = logging.getLogger("moderation")
 
 BANNED_WORDS = {"badword1", "badword2"}  # extend via config / DB
 MASS_PING_THRESHOLD = 5  # mentions in single message to consider
 
+def _name_stem(name: str) -> str:
+    # "lagoona_fan123" and "LagoonaFan" -> "lagoonafan"
+    return re.sub(r"[^a-z]", "", name.lower())
+
 class ModerationCog(commands.Cog, name="ModerationCog"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.recent_joins = []  # timestamps of recent joins for raid detection
+        # join counters for raid detection; shared across clusters when running sharded
+        self.shared_state = bot.shared_state if hasattr(bot, "shared_state") else LocalState()
+        self.member_resolver = bot.member_resolver if hasattr(bot, "member_resolver") else MemberResolver(bot)
         self.join_window = timedelta(seconds=60)
         self.join_threshold = 5  # join count within join_window to consider raid
 
     @commands.Cog.listener()
+    @traced("moderation.on_message")
     async def on_message(self, message: discord.Message):
         # ignore bot messages
         if not message.guild or message.author.bot:
@@ -46,15 +56,11 @@ class ModerationCog(commands.Cog, name="ModerationCog"):
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
-        # Add to recent_joins and check for raid
-        now = datetime.utcnow()
-        self.recent_joins.append(now)
-        # drop old timestamps
-        window_start = now - self.join_window
-        self.recent_joins = [t for t in self.recent_joins if t >= window_start]
-        if len(self.recent_joins) >= self.join_threshold:
+        # Count joins in this guild's window and check for raid
+        recent_joins = await self.shared_state.hit(f"joins:{member.guild.id}", self.join_window.total_seconds())
+        if recent_joins >= self.join_threshold:
             # raid suspected: notify mods
-            logger.warning("Possible raid detected: %d joins in last %s", len(self.recent_joins), self.join_window)
+            logger.warning("Possible raid detected in guild %s: %d joins in last %s", member.guild.id, recent_joins, self.join_window)
             # notify the first text channel available
             for ch in member.guild.text_channels:
                 try:
@@ -70,7 +76,6 @@ class ModerationCog(commands.Cog, name="ModerationCog"):
         # Heuristic checks:
         # - account age
         account_age = (discord.utils.utcnow() - user.created_at).days
-        # - username similarity to existing members? (placeholder)
         # - recent join date
         join_age = (discord.utils.utcnow() - user.joined_at).days if user.joined_at else None
 
@@ -78,6 +83,14 @@ class ModerationCog(commands.Cog, name="ModerationCog"):
         embed.add_field(name="Account Age (days)", value=str(account_age), inline=True)
         embed.add_field(name="Joined Server (days)", value=str(join_age) if join_age is not None else "Unknown", inline=True)
 
+        # - username similarity to existing members (a prefix query, so the member list is never cached)
+        stem = _name_stem(user.name)
+        candidates = await self.member_resolver.search_members(interaction.guild, user.name[:4]) if len(stem) >= 4 else None
+        if candidates is not None:
+            similar = [m for m in candidates if m.id != user.id and _name_stem(m.name) == stem]
+            value = ", ".join(m.mention for m in similar[:5]) + (f" +{len(similar) - 5}" if len(similar) > 5 else "")
+            embed.add_field(name="Similar Names", value=value or "None", inline=False)
+
         # More advanced checks could call external APIs (e.g., fraud/alt detection) — plug here.
         await interaction.followup.send(embed=embed, ephemeral=True)
 
@@ -2,6 +2,8 @@
 import discord
 from discord.ext import commands
 import aiohttp, asyncio, os, logging, random
+from utils.outbound import OutboundScheduler
+from utils.tracing import tracer, traced
 
 logger = logging.getLogger("smart_autoresponder")
 
@@ -17,6 +19,7 @@ BANNED_TOPICS = (
 
 
 # -------------------------------------------------
+@traced("llm.call")
 async def call_llm(prompt: str) -> str:
     """Query Gemini or ChatGPT with restricted topic scope."""
     gemini = os.getenv("GEMINI_API_KEY")
@@ -26,6 +29,7 @@ async def call_llm(prompt: str) -> str:
         async with aiohttp.ClientSession() as s:
             # ---- GEMINI ----
             if gemini:
+                tracer.current().set_attribute("llm.provider", "gemini")
                 url = (
                     f"https://generativelanguage.googleapis.com/v1beta/models/"
                     f"gemini-pro:generateContent?key={gemini}"
@@ -54,6 +58,7 @@ async def call_llm(prompt: str) -> str:
 
             # ---- CHATGPT ----
             elif openai:
+                tracer.current().set_attribute("llm.provider", "openai")
                 url = "https://api.openai.com/v1/chat/completions"
                 headers = {"Authorization": f"Bearer {openai}"}
                 payload = {
@@ -88,22 +93,19 @@ class SmartResponder(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
+        self.outbound = bot.outbound if hasattr(bot, "outbound") else OutboundScheduler()
 
     # --- handle all incoming messages ---
     @commands.Cog.listener()
+    @traced("smart_autoresponder.on_message")
     async def on_message(self, msg: discord.Message):
         # Ignore bots or DMs
         if not msg.guild or msg.author.bot:
             return
 
-        # 1️⃣ Announcement channels — react only
+        # 1️⃣ Announcement channels — react only (queued & paced by the shared outbound scheduler)
         if getattr(msg.channel, "is_news", lambda: False)():
-            for emoji in ("⭐", "💛", "🫶"):
-                try:
-                    await msg.add_reaction(emoji)
-                    await asyncio.sleep(0.4)  # rate-limit safety
-                except Exception:
-                    pass
+            self.outbound.react(msg, "⭐", "💛", "🫶")
             return
 
         # 2️⃣ Normal chat — reply when Lagoona mentioned
@@ -116,9 +118,11 @@ class SmartResponder(commands.Cog):
                 await msg.reply("That’s outside the studio’s scope 🌊 let's keep it on Roblox topics!")
                 return
 
-            async with msg.channel.typing():
-                reply_text = await call_llm(msg.content)
-                await asyncio.sleep(0.3)
+            with tracer.span("discord.typing"):
+                async with msg.channel.typing():
+                    reply_text = await call_llm(msg.content)
+                    with tracer.span("delay", **{"delay.seconds": 0.3}):
+                        await asyncio.sleep(0.3)
 
             embed = discord.Embed(
                 title="🌊 Lagoona",
@@ -127,10 +131,8 @@ class SmartResponder(commands.Cog):
             )
             embed.set_image(url=random.choice(BANNERS))
 
-            try:
-                await msg.reply(embed=embed, mention_author=False)
-            except Exception as e:
-                logger.warning("Embed reply failed: %s", e)
+            # failures are logged by the outbound scheduler; reply is dropped if msg gets deleted meanwhile
+            self.outbound.reply(msg, embed=embed, mention_author=False)
 
     # --- decorate Lagoona's own embeds in announcement channels ---
     @commands.Cog.listener()
@@ -141,10 +143,8 @@ class SmartResponder(commands.Cog):
                 return
             for embed in after.embeds:
                 embed.set_image(url=random.choice(BANNERS))
-            try:
-                await after.edit(embeds=after.embeds)
-            except Exception:
-                pass
+            # queued edits to the same message collapse into the latest one
+            self.outbound.edit(after, embeds=after.embeds)
 
 
 async def setup(bot: commands.Bot):
@@ -4,6 +4,7 @@ from discord.ext import commands
 from discord import app_commands
 import logging
 import os
+from utils.member_cache import MemberResolver
 
 logger = logging.getLogger("tickets")
 
@@ -12,6 +13,7 @@ TICKETS_CATEGORY_NAME = os.environ.get("TICKET_CAT_NAME", "Support Tickets")
 class TicketCog(commands.Cog, name="TicketCog"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.member_resolver = bot.member_resolver if hasattr(bot, "member_resolver") else MemberResolver(bot)
 
     @app_commands.command(name="ticket", description="Open a support ticket.")
     @app_commands.describe(reason="Brief reason for your ticket")
@@ -27,12 +29,18 @@ class TicketCog(commands.Cog, name="TicketCog"):
         if not category:
             category = await guild.create_category(TICKETS_CATEGORY_NAME)
 
+        # Interactions normally carry the member; fall back to a fetch rather than relying on the member cache
+        member = interaction.user if isinstance(interaction.user, discord.Member) else await self.member_resolver.get_member(guild, interaction.user.id)
+        if member is None:
+            await interaction.followup.send("Couldn't find you in this server.", ephemeral=True)
+            return
+
         # Create channel name
-        name = f"ticket-{interaction.user.name}-{interaction.user.discriminator}"
+        name = f"ticket-{member.name}-{member.discriminator}"
         # Create permission overwrites
         overwrites = {
             guild.default_role: discord.PermissionOverwrite(read_messages=False),
-            interaction.user: discord.PermissionOverwrite(read_messages=True, send_messages=True),
+            member: discord.PermissionOverwrite(read_messages=True, send_messages=True),
         }
         # Add mods from role id if provided
         mod_role_id = os.environ.get("MOD_ROLE_ID")
@@ -3,13 +3,16 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import asyncio
-import yt_dlp
 import logging
+import os
+from collections import deque
+from utils.extraction import ExtractionPool
+from utils.audio_cache import OpusCache
 
 logger = logging.getLogger("voice")
 
-# Suppress yt_dlp console spam
-yt_dlp.utils.bug_reports_message = lambda: ""
+IDLE_TIMEOUT = float(os.environ.get("VOICE_IDLE_TIMEOUT", 300))  # seconds before an idle voice client disconnects
+MAX_QUEUE = int(os.environ.get("VOICE_MAX_QUEUE", 100))
 
 
 # --- Audio Source Helper ---
@@ -29,25 +32,219 @@ class YTDLSource(discord.PCMVolumeTransformer):
         "options": "-vn"
     }
 
-    ytdl = yt_dlp.YoutubeDL(YTDL_OPTIONS)
+    DEFAULT_VOLUME = 0.5
 
-    def __init__(self, source, *, data, volume=0.5):
+    _pool = None  # dedicated extraction workers + metadata cache, created on first use
+    _cache = None  # on-disk Opus transcode cache, created on first use
+
+    def __init__(self, source, *, data, volume=DEFAULT_VOLUME):
         super().__init__(source, volume)
         self.data = data
         self.title = data.get("title")
         self.url = data.get("url")
 
+    @classmethod
+    def pool(cls) -> ExtractionPool:
+        if cls._pool is None:
+            cls._pool = ExtractionPool(cls.YTDL_OPTIONS)
+        return cls._pool
+
+    @classmethod
+    def cache(cls) -> OpusCache:
+        if cls._cache is None:
+            cls._cache = OpusCache(volume=cls.DEFAULT_VOLUME)
+        return cls._cache
+
+    @classmethod
+    def shutdown_pool(cls):
+        if cls._pool is not None:
+            cls._pool.shutdown()
+            cls._pool = None
+        if cls._cache is not None:
+            cls._cache.shutdown()
+            cls._cache = None
+
+    @classmethod
+    async def extract(cls, url, *, loop=None, stream=False):
+        """Resolve metadata (and the stream URL) for a given URL without opening ffmpeg."""
+        return await cls.pool().extract(url, download=not stream)
+
+    @classmethod
+    def from_data(cls, data, *, stream=True):
+        """Build a playable source from already-extracted metadata."""
+        filename = data["url"] if stream else cls.pool().prepare_filename(data)
+        return cls(discord.FFmpegPCMAudio(filename, **cls.FFMPEG_OPTIONS), data=data)
+
+    @classmethod
+    def for_playback(cls, data, *, volume=None):
+        """
+        Cheapest source for this track. With the default volume and a cached transcode we pass the Opus packets
+        straight through (no decode, no re-encode); otherwise stream via PCM and cache the track for next time.
+        """
+        if volume is None:
+            cached = cls.cache().lookup(data)
+            if cached:
+                source = discord.FFmpegOpusAudio(str(cached), codec="copy")
+                source.title = data.get("title")
+                return source
+        cls.cache().schedule(data)
+        source = cls.from_data(data)
+        if volume is not None:
+            source.volume = volume
+        return source
+
     @classmethod
     async def from_url(cls, url, *, loop=None, stream=False):
         """Download or stream from a given URL."""
-        loop = loop or asyncio.get_event_loop()
-        data = await loop.run_in_executor(None, lambda: cls.ytdl.extract_info(url, download=not stream))
+        data = await cls.extract(url, loop=loop, stream=stream)
+        return cls.from_data(data, stream=stream)
 
-        if "entries" in data:
-            data = data["entries"][0]
 
-        filename = data["url"] if stream else cls.ytdl.prepare_filename(data)
-        return cls(discord.FFmpegPCMAudio(filename, **cls.FFMPEG_OPTIONS), data=data)
+# --- Playback queue ---
+class Track:
+    """A queued request. Metadata is resolved lazily (prefetched while the previous track plays)."""
+
+    def __init__(self, query: str, requester: discord.abc.User):
+        self.query = query
+        self.requester = requester
+        self.data = None
+        self._resolving = None
+
+    @property
+    def title(self):
+        return self.data.get("title") if self.data else self.query
+
+    def resolve(self, loop) -> asyncio.Future:
+        """Start (or join) metadata extraction for this track."""
+        if self._resolving is None or (self._resolving.done() and self._resolving.exception()):
+            self._resolving = loop.create_task(YTDLSource.extract(self.query, loop=loop, stream=True))
+            self._resolving.add_done_callback(self._store)
+        return self._resolving
+
+    def _store(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is None:
+            self.data = task.result()
+
+    def cancel(self):
+        if self._resolving and not self._resolving.done():
+            self._resolving.cancel()
+
+
+class GuildPlayer:
+    """Per-guild queue: plays tracks back to back, prefetches the next one and disconnects when idle."""
+
+    def __init__(self, cog: "VoiceCog", guild: discord.Guild):
+        self.cog = cog
+        self.bot = cog.bot
+        self.guild = guild
+        self.queue = deque()
+        self.current = None
+        self._idle_handle = None
+        self._starting = False
+        self._destroyed = False
+        self.volume = None  # None = default volume, which allows Opus passthrough of cached tracks
+
+    @property
+    def voice_client(self):
+        return self.guild.voice_client
+
+    @property
+    def active(self):
+        """True while a track is playing or the next one is being started."""
+        return self.current is not None or self._starting
+
+    def enqueue(self, track: Track):
+        if len(self.queue) >= MAX_QUEUE:
+            raise ValueError(f"The queue is full ({MAX_QUEUE} tracks).")
+        self.queue.append(track)
+        self._cancel_idle()
+        if self.active:
+            self._prefetch_next()
+
+    def _prefetch_next(self):
+        # only the head of the queue: stream URLs expire, so resolving further ahead is wasted work
+        if self.queue:
+            self.queue[0].resolve(self.bot.loop)
+
+    async def play_next(self):
+        """Start the next track in the queue, skipping ones that fail to resolve."""
+        if self._destroyed:
+            return None
+        self.current = None
+        self._starting = True
+        try:
+            while self.queue:
+                vc = self.voice_client
+                if not vc or not vc.is_connected():
+                    break
+                track = self.queue.popleft()
+                try:
+                    await track.resolve(self.bot.loop)
+                    source = YTDLSource.for_playback(track.data, volume=self.volume)
+                except Exception as e:
+                    logger.warning("Skipping %r in guild %s: %s", track.query, self.guild.id, e)
+                    continue
+                if self._destroyed:
+                    source.cleanup()
+                    return None
+                try:
+                    vc.play(source, after=self._after)
+                except Exception as e:
+                    # e.g. ClientException when the voice connection dropped in the meantime
+                    logger.warning("Could not start %r in guild %s: %s", track.query, self.guild.id, e)
+                    source.cleanup()
+                    continue
+                self.current = track
+                self._prefetch_next()
+                return track
+        finally:
+            self._starting = False
+        self.schedule_idle()
+        return None
+
+    def _after(self, error):
+        # runs on the voice player thread
+        if error:
+            logger.error("Player error in guild %s: %s", self.guild.id, error)
+        asyncio.run_coroutine_threadsafe(self.play_next(), self.bot.loop)
+
+    def skip(self):
+        vc = self.voice_client
+        if vc and (vc.is_playing() or vc.is_paused()):
+            vc.stop()  # triggers _after -> play_next
+
+    def clear(self):
+        for track in self.queue:
+            track.cancel()
+        self.queue.clear()
+
+    def schedule_idle(self):
+        """Disconnect after IDLE_TIMEOUT unless something is queued or played before then."""
+        self._cancel_idle()
+        self._idle_handle = self.bot.loop.call_later(IDLE_TIMEOUT, lambda: asyncio.ensure_future(self._disconnect_if_idle()))
+
+    def _cancel_idle(self):
+        if self._idle_handle:
+            self._idle_handle.cancel()
+            self._idle_handle = None
+
+    async def _disconnect_if_idle(self):
+        self._idle_handle = None
+        vc = self.voice_client
+        if self.active or self.queue or (vc and (vc.is_playing() or vc.is_paused())):
+            return
+        if vc:
+            logger.info("Disconnecting idle voice client in guild %s", self.guild.id)
+            await vc.disconnect()
+        if self.cog.players.get(self.guild.id) is self:
+            del self.cog.players[self.guild.id]
+        self.destroy()
+
+    def destroy(self):
+        self._destroyed = True
+        self._cancel_idle()
+        self.clear()
+        self.current = None
 
 
 # --- Voice Cog ---
@@ -56,6 +253,27 @@ class VoiceCog(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
+        self.players = {}  # guild_id -> GuildPlayer
+
+    def get_player(self, guild: discord.Guild) -> GuildPlayer:
+        player = self.players.get(guild.id)
+        if player is None:
+            player = self.players[guild.id] = GuildPlayer(self, guild)
+        return player
+
+    def cog_unload(self):
+        for player in self.players.values():
+            player.destroy()
+        self.players.clear()
+        YTDLSource.shutdown_pool()
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        # clean up when we get disconnected (kicked, /leave, idle timeout)
+        if self.bot.user and member.id == self.bot.user.id and before.channel and not after.channel:
+            player = self.players.pop(member.guild.id, None)
+            if player:
+                player.destroy()
 
     @app_commands.command(name="join", description="Join your current voice channel.")
     async def join(self, interaction: discord.Interaction):
@@ -70,6 +288,10 @@ class VoiceCog(commands.Cog):
         else:
             await channel.connect()
 
+        player = self.get_player(interaction.guild)
+        if not player.active and not player.queue:
+            player.schedule_idle()  # joined but nothing played yet: don't sit in the channel forever
+
         await interaction.followup.send(f"🎧 Joined **{channel.name}**!", ephemeral=True)
 
     @app_commands.command(name="leave", description="Disconnect Lagoona from voice.")
@@ -78,6 +300,9 @@ class VoiceCog(commands.Cog):
         if not vc:
             await interaction.response.send_message("I'm not connected to any voice channel!", ephemeral=True)
             return
+        player = self.players.pop(interaction.guild.id, None)
+        if player:
+            player.destroy()
         await vc.disconnect()
         await interaction.response.send_message("👋 Left the voice channel!", ephemeral=True)
 
@@ -92,14 +317,84 @@ class VoiceCog(commands.Cog):
             channel = interaction.user.voice.channel
             vc = await channel.connect()
 
+        player = self.get_player(interaction.guild)
+        track = Track(url, interaction.user)
         try:
-            player = await YTDLSource.from_url(url, loop=self.bot.loop, stream=True)
-            vc.play(player, after=lambda e: logger.error(e) if e else None)
-            await interaction.followup.send(f"▶️ Now playing: **{player.title}**", ephemeral=False)
+            player.enqueue(track)
+        except ValueError as e:
+            await interaction.followup.send(f"❌ {e}", ephemeral=True)
+            return
+
+        if player.active or vc.is_playing() or vc.is_paused():
+            await interaction.followup.send(f"➕ Queued at position {len(player.queue)}: **{track.title}**", ephemeral=False)
+            return
+
+        try:
+            started = await player.play_next()
         except Exception as e:
             logger.exception("Error playing audio: %s", e)
+            started = None
+        if started:
+            await interaction.followup.send(f"▶️ Now playing: **{started.title}**", ephemeral=False)
+        else:
             await interaction.followup.send("❌ Failed to play that audio.", ephemeral=True)
 
+    @app_commands.command(name="queue", description="Show the playback queue.")
+    async def queue(self, interaction: discord.Interaction):
+        player = self.players.get(interaction.guild.id)
+        if not player or (player.current is None and not player.queue):
+            await interaction.response.send_message("The queue is empty.", ephemeral=True)
+            return
+        lines = []
+        if player.current:
+            lines.append(f"▶️ **{player.current.title}** (requested by {player.current.requester.display_name})")
+        for i, track in enumerate(list(player.queue)[:15], start=1):
+            lines.append(f"`{i}.` {track.title} (requested by {track.requester.display_name})")
+        if len(player.queue) > 15:
+            lines.append(f"…and {len(player.queue) - 15} more")
+        await interaction.response.send_message("\n".join(lines), ephemeral=True)
+
+    @app_commands.command(name="skip", description="Skip the current track.")
+    async def skip(self, interaction: discord.Interaction):
+        player = self.players.get(interaction.guild.id)
+        vc = interaction.guild.voice_client
+        if not player or not vc or not (vc.is_playing() or vc.is_paused()):
+            await interaction.response.send_message("Nothing is playing.", ephemeral=True)
+            return
+        skipped = player.current
+        player.skip()
+        await interaction.response.send_message(f"⏭️ Skipped **{skipped.title if skipped else 'track'}**.", ephemeral=False)
+
+    @app_commands.command(name="nowplaying", description="Show the track that is playing.")
+    async def nowplaying(self, interaction: discord.Interaction):
+        player = self.players.get(interaction.guild.id)
+        if not player or not player.current:
+            await interaction.response.send_message("Nothing is playing right now.", ephemeral=True)
+            return
+        track = player.current
+        embed = discord.Embed(title="🎶 Now Playing", description=f"**{track.title}**", color=discord.Color.blurple())
+        if track.data and track.data.get("webpage_url"):
+            embed.url = track.data["webpage_url"]
+        if track.data and track.data.get("thumbnail"):
+            embed.set_thumbnail(url=track.data["thumbnail"])
+        embed.add_field(name="Requested by", value=track.requester.mention, inline=True)
+        embed.add_field(name="Up next", value=player.queue[0].title if player.queue else "Nothing", inline=True)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="volume", description="Set playback volume (0-200%).")
+    @app_commands.describe(percent="Volume in percent; 50 is the default")
+    async def volume(self, interaction: discord.Interaction, percent: app_commands.Range[int, 0, 200]):
+        player = self.get_player(interaction.guild)
+        value = percent / 100
+        player.volume = None if value == YTDLSource.DEFAULT_VOLUME else value
+        vc = interaction.guild.voice_client
+        if vc and isinstance(vc.source, discord.PCMVolumeTransformer):
+            vc.source.volume = value
+            await interaction.response.send_message(f"🔊 Volume set to **{percent}%**.", ephemeral=True)
+        else:
+            # cached tracks play as untouched Opus, so the change applies from the next track
+            await interaction.response.send_message(f"🔊 Volume set to **{percent}%** from the next track.", ephemeral=True)
+
     @app_commands.command(name="pause", description="Pause the current playback.")
     async def pause(self, interaction: discord.Interaction):
         vc = interaction.guild.voice_client
@@ -124,6 +419,9 @@ class VoiceCog(commands.Cog):
         if not vc or not vc.is_playing():
             await interaction.response.send_message("Nothing is playing.", ephemeral=True)
             return
+        player = self.players.get(interaction.guild.id)
+        if player:
+            player.clear()  # stop means stop: don't roll on to the next queued track
         vc.stop()
         await interaction.response.send_message("⏹️ Stopped playback.", ephemeral=True)
 
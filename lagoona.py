@@ -1,91 +1,219 @@
 # lagoona.py
 import os
+import math
+import time
 import asyncio
 import logging
 import threading
 from discord.ext import commands, tasks
 import discord
 
+from utils.logging_setup import setup_logging
 from utils.webserver import start_webserver
 from utils.interaction_helpers import safe_respond
 from utils.image_store import ImageStore
+from utils.outbound import OutboundScheduler
+from utils.command_sync import sync_if_changed
+from utils.shared_state import LocalState, IPCState
+from utils.cluster import run_launcher, HEALTH_INTERVAL
+from utils.member_cache import MemberResolver, client_options as member_cache_options
+from utils.tracing import tracer, instrument_trace_config, TRACE_SYNC_INTERVAL
 
 LOGLEVEL = os.environ.get("LOGLEVEL", "INFO")
-logging.basicConfig(level=LOGLEVEL)
+setup_logging(LOGLEVEL)  # queue-based: log calls never write to stderr on the event loop
 logger = logging.getLogger("lagoona")
 
 # Bot intents (tune as needed)
 intents = discord.Intents.default()
-intents.members = True
+intents.members = True  # join events for raid detection; how much of the member list is cached is set by MEMBER_CACHE
 intents.message_content = True  # required for some moderation features
 
 BOT_PREFIX = "!"
+# None of these depend on each other, so they are loaded concurrently
+EXTENSIONS = (
+    "cogs.moderation",
+    "cogs.announcements",
+    "cogs.tickets",
+    "cogs.voice_commands",
+    "cogs.mention_response",
+    "cogs.autoresponder",
+    "cogs.smart_autoresponder",
+)
 OWNER_ID = int(os.environ.get("OWNER_ID", 0)) if os.environ.get("OWNER_ID") else None
 
-class LagoonaBot(commands.Bot):
-    def __init__(self):
+def _env_shard_ids():
+    raw = os.environ.get("SHARD_IDS")  # e.g. "0,1,2"; usually left unset outside cluster mode
+    return [int(x) for x in raw.split(",") if x.strip()] if raw else None
+
+class LagoonaBot(commands.AutoShardedBot):
+    def __init__(self, shard_ids=None, shard_count=None, cluster_id=0, shared_state=None):
+        # Shared outbound queue; its aiohttp trace reads rate-limit headers off every REST response
+        outbound = OutboundScheduler()
+        instrument_trace_config(outbound.trace_config)  # REST calls show up as spans in sampled traces
+        if shard_count is None and os.environ.get("SHARD_COUNT"):
+            shard_count = int(os.environ["SHARD_COUNT"])
         super().__init__(
             command_prefix=BOT_PREFIX,
             intents=intents,
             application_id=int(os.environ.get("CLIENT_ID")) if os.environ.get("CLIENT_ID") else None,
+            http_trace=outbound.trace_config,
+            shard_ids=shard_ids if shard_ids is not None else _env_shard_ids(),
+            shard_count=shard_count,  # None = ask Discord for the recommended count
+            **member_cache_options(),
         )
+        self.cluster_id = cluster_id
+        # Cross-shard/cross-cluster counters and health (IPC-backed in cluster mode)
+        self.shared_state = shared_state or LocalState()
+        if isinstance(self.shared_state, IPCState):
+            tracer.enable_forwarding()  # the launcher's webserver serves traces for every cluster
+        self.outbound = outbound
+        self.member_resolver = MemberResolver(self)
         self.image_store = ImageStore(static_dir="static/banners")
         self.ready_event = asyncio.Event()
+        self.boot_started = time.perf_counter()
+        self.startup_timings = {}  # step -> seconds, logged once the bot is ready
 
     async def setup_hook(self):
+        # Drop queued reactions/edits/replies for messages that get deleted
+        self.add_listener(self.outbound.on_raw_message_delete)
+        self.add_listener(self.outbound.on_raw_bulk_message_delete)
+        self.add_listener(self.member_resolver.on_guild_remove)
+
+        self.report_health.start()
+        if isinstance(self.shared_state, IPCState):
+            self.sync_traces.start()
+
         # Load cogs
-        await self.load_extension("cogs.moderation")
-        await self.load_extension("cogs.announcements")
-        await self.load_extension("cogs.tickets")
-        await self.load_extension("cogs.voice_commands")
-        await self.load_extension("cogs.mention_response")
-        await self.load_extension("cogs.autoresponder")
-        await self.load_extension("cogs.smart_autoresponder")
-
-        # Sync slash commands
-        try:
-            await self.tree.sync()
-            logger.info("Slash commands synced.")
-        except Exception as e:
-            logger.exception("Failed to sync slash commands: %s", e)
+        started = time.perf_counter()
+        results = await asyncio.gather(*(self._load_timed(ext) for ext in EXTENSIONS), return_exceptions=True)
+        failed = []
+        for ext, result in zip(EXTENSIONS, results):
+            if isinstance(result, BaseException):
+                failed.append(ext)
+                logger.error("Failed to load %s: %s", ext, result, exc_info=result)
+        self.startup_timings["extensions"] = time.perf_counter() - started
+
+        # Sync slash commands (only when the command tree changed since the last deploy)
+        if failed:
+            # a partial tree would delete the broken cogs' commands globally; keep what Discord has
+            logger.error("Skipping slash command sync because %d extension(s) failed to load: %s",
+                         len(failed), ", ".join(failed))
+        else:
+            started = time.perf_counter()
+            try:
+                await sync_if_changed(self.tree, self.application_id)
+            except Exception as e:
+                logger.exception("Failed to sync slash commands: %s", e)
+            self.startup_timings["command_sync"] = time.perf_counter() - started
 
         # ✅ Schedule background tasks here (inside setup_hook!)
         self.loop.create_task(self.start_background_tasks())
 
+    def dispatch(self, event_name: str, /, *args, **kwargs):
+        if event_name != "message":
+            return super().dispatch(event_name, *args, **kwargs)
+        # Root span per incoming message: listener tasks are created inside it, so they inherit it as parent.
+        # It closes once dispatch returns; the trace's total duration comes from its slowest child.
+        message = args[0]
+        with tracer.root_span("discord.message", **{
+            "discord.message_id": message.id,
+            "discord.channel_id": message.channel.id,
+            "discord.guild_id": message.guild.id if message.guild else None,
+            "cluster": self.cluster_id,
+        }):
+            super().dispatch(event_name, *args, **kwargs)
+
+    async def _load_timed(self, ext: str):
+        started = time.perf_counter()
+        await self.load_extension(ext)
+        self.startup_timings[ext] = time.perf_counter() - started
+
     async def start_background_tasks(self):
         await self.wait_until_ready()
         cog = self.get_cog("AnnouncementsCog")
-        if cog and hasattr(cog, "daily_post_loop"):
-            cog.daily_post_loop.start()
-            logger.info("Started daily_post_loop from setup_hook().")
+        if cog and hasattr(cog, "start_scheduler"):
+            cog.start_scheduler()
+            logger.info("Started post scheduler from setup_hook().")
+
+    def health_snapshot(self) -> dict:
+        shards = {}
+        for shard_id, shard in self.shards.items():
+            latency = shard.latency
+            shards[str(shard_id)] = {
+                "latency_ms": round(latency * 1000) if math.isfinite(latency) else None,
+                "closed": shard.is_closed(),
+            }
+        return {
+            "cluster": self.cluster_id,
+            "pid": os.getpid(),
+            "ready": self.is_ready(),
+            "guilds": len(self.guilds),
+            "shards": shards,
+            "uptime": round(time.perf_counter() - self.boot_started),
+            "updated": time.time(),
+        }
+
+    @tasks.loop(seconds=HEALTH_INTERVAL)
+    async def report_health(self):
+        await self.shared_state.report_health(self.cluster_id, self.health_snapshot())
+
+    @tasks.loop(seconds=TRACE_SYNC_INTERVAL)
+    async def sync_traces(self):
+        # upload finished spans and pick up sample-rate changes made through the launcher's webserver
+        rate = await self.shared_state.sync_traces(tracer.take_outbox())
+        if rate is not None and rate != tracer.sample_rate:
+            tracer.set_sample_rate(rate)
 
     async def on_ready(self):
-        logger.info(f"Logged in as {self.user} (id: {self.user.id})")
+        logger.info(f"Logged in as {self.user} (id: {self.user.id}, cluster {self.cluster_id}, shards {self.shard_ids or 'all'})")
+        if not self.ready_event.is_set():
+            self.startup_timings["ready"] = time.perf_counter() - self.boot_started
+            logger.info("Startup timings: %s", ", ".join(f"{k}={v * 1000:.0f}ms" for k, v in self.startup_timings.items()))
         self.ready_event.set()
+        # tell the launcher/webserver right away rather than at the next interval
+        await self.shared_state.report_health(self.cluster_id, self.health_snapshot())
 
-def start_background_webserver():
+def start_background_webserver(health_source=None):
     try:
         port = int(os.environ.get("PORT", 8080))
         logger.info(f"Starting Lagoona webserver on port {port} (threaded)")
-        start_webserver(port=port)
+        start_webserver(port=port, health_source=health_source)
     except Exception as e:
         logger.exception("Webserver crashed: %s", e)
 
+def run_cluster(cluster_id, shard_ids, shard_count, ipc_address):
+    """Entry point for one cluster process spawned by the launcher."""
+    host, port = ipc_address.rsplit(":", 1)
+    bot = LagoonaBot(
+        shard_ids=shard_ids,
+        shard_count=shard_count,
+        cluster_id=cluster_id,
+        shared_state=IPCState(host, int(port)),
+    )
+    bot.run(os.environ["DISCORD_TOKEN"], log_handler=None)
+
 def main():
     try:
-        # Start healthcheck webserver in separate thread
-        web_thread = threading.Thread(target=start_background_webserver, daemon=True)
-        web_thread.start()
-
-        bot = LagoonaBot()
-
         token = os.environ.get("DISCORD_TOKEN")
         if not token:
             logger.error("DISCORD_TOKEN not set in environment.")
             return
 
+        # Cluster mode: this process only supervises; bots run in child processes
+        cluster_count = int(os.environ.get("CLUSTER_COUNT", 1))
+        if cluster_count > 1:
+            run_launcher(run_cluster, cluster_count, token, int(os.environ.get("PORT", 8080)))
+            return
+
+        bot = LagoonaBot()
+
+        # Start healthcheck webserver in separate thread
+        web_thread = threading.Thread(target=start_background_webserver, args=(bot.shared_state.health_snapshot,), daemon=True)
+        web_thread.start()
+
         # Just run the bot normally — no manual .loop access needed
-        bot.run(token)
+        # log_handler=None: keep discord.py from adding its own blocking stderr handler
+        bot.run(token, log_handler=None)
 
     except Exception as e:
         logger.exception("Lagoona crashed during startup: %s", e)
@@ -0,0 +1,127 @@
+# tests/test_outbound.py
+import asyncio
+from types import SimpleNamespace
+
+import discord
+import pytest
+
+from utils.outbound import OutboundScheduler
+
+
+def _not_found():
+    return discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown")
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, missing: bool = False):
+        self.id = channel_id
+        self.missing = missing
+        self.sent = []
+
+    async def send(self, **kwargs):
+        await asyncio.sleep(0)
+        if self.missing:
+            raise _not_found()
+        self.sent.append(kwargs)
+        return kwargs
+
+
+class FakeMessage:
+    def __init__(self, message_id: int, channel: FakeChannel, deleted: bool = False):
+        self.id = message_id
+        self.channel = channel
+        self.deleted = deleted
+        self.edits = []
+        self.reactions = []
+        self.replies = []
+
+    async def _check(self):
+        await asyncio.sleep(0)
+        if self.deleted:
+            raise _not_found()
+
+    async def edit(self, **kwargs):
+        await self._check()
+        self.edits.append(kwargs)
+        return kwargs
+
+    async def add_reaction(self, emoji):
+        await self._check()
+        self.reactions.append(emoji)
+
+    async def reply(self, **kwargs):
+        await self._check()
+        self.replies.append(kwargs)
+        return kwargs
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_pending_edits_are_coalesced_into_the_latest():
+    async def go():
+        outbound = OutboundScheduler()
+        message = FakeMessage(1, FakeChannel(10))
+        first = outbound.edit(message, content="a")
+        second = outbound.edit(message, content="b")
+        third = outbound.edit(message, content="c")
+        results = await asyncio.gather(first, second, third)
+        return message.edits, results
+
+    edits, results = run(go())
+    # all three were queued before the worker ran, so only the last one is sent
+    assert edits == [{"content": "c"}]
+    assert results == [{"content": "c"}] * 3
+
+
+def test_actions_for_deleted_messages_are_dropped():
+    async def go():
+        outbound = OutboundScheduler()
+        message = FakeMessage(2, FakeChannel(11))
+        outbound.mark_deleted(message.id)
+        results = await asyncio.gather(outbound.react(message, "⭐"), outbound.reply(message, content="hi"))
+        return message, results
+
+    message, results = run(go())
+    assert message.reactions == [] and message.replies == []
+    assert results == [None, None]
+
+
+def test_not_found_on_a_message_marks_it_deleted():
+    async def go():
+        outbound = OutboundScheduler()
+        message = FakeMessage(3, FakeChannel(12), deleted=True)
+        result = await outbound.reply(message, content="hi")
+        return outbound, result
+
+    outbound, result = run(go())
+    assert result is None
+    assert 3 in outbound._deleted
+
+
+def test_not_found_on_a_plain_send_does_not_block_later_sends():
+    async def go():
+        outbound = OutboundScheduler()
+        gone, healthy = FakeChannel(13, missing=True), FakeChannel(14)
+        with pytest.raises(discord.NotFound):
+            await outbound.send(gone, content="lost")
+        await outbound.send(healthy, content="delivered")
+        return outbound, healthy
+
+    outbound, healthy = run(go())
+    assert healthy.sent == [{"content": "delivered"}]
+    assert not outbound._deleted
+
+
+def test_idle_buckets_are_released():
+    async def go():
+        outbound = OutboundScheduler()
+        channel = FakeChannel(15)
+        await asyncio.gather(*(outbound.send(channel, content=str(i)) for i in range(5)))
+        await asyncio.sleep(0)
+        return outbound, channel
+
+    outbound, channel = run(go())
+    assert [m["content"] for m in channel.sent] == ["0", "1", "2", "3", "4"]
+    assert outbound._buckets == {}
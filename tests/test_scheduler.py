@@ -0,0 +1,176 @@
+# tests/test_scheduler.py
+import asyncio
+import json
+from dataclasses import asdict
+from datetime import datetime
+
+import pytest
+
+from utils.scheduler import MAX_CATCH_UP_RUNS, CronExpression, PostScheduler, ScheduledJob
+
+MINUTE = 60.0
+NOW = 1_800_000_000.0  # a fixed "now" on a minute boundary (2027-01-15 08:00 UTC)
+
+
+# --- cron parsing ---
+def test_next_after_every_minute():
+    cron = CronExpression("* * * * *")
+    assert cron.next_after(datetime(2026, 3, 1, 12, 0, 30)) == datetime(2026, 3, 1, 12, 1)
+
+
+def test_next_after_daily_rolls_over_month_and_year():
+    cron = CronExpression("30 9 * * *")
+    assert cron.next_after(datetime(2026, 1, 31, 9, 30)) == datetime(2026, 2, 1, 9, 30)
+    assert cron.next_after(datetime(2026, 12, 31, 10, 0)) == datetime(2027, 1, 1, 9, 30)
+
+
+def test_next_after_steps_and_ranges():
+    cron = CronExpression("*/15 8-10 * * *")
+    assert cron.next_after(datetime(2026, 3, 1, 10, 45)) == datetime(2026, 3, 2, 8, 0)
+    assert cron.next_after(datetime(2026, 3, 1, 8, 14)) == datetime(2026, 3, 1, 8, 15)
+
+
+@pytest.mark.parametrize("dow", ["0", "7"])
+def test_sunday_as_0_or_7(dow):
+    cron = CronExpression(f"0 9 * * {dow}")
+    # 2026-03-01 is a Sunday
+    assert cron.next_after(datetime(2026, 2, 26, 0, 0)) == datetime(2026, 3, 1, 9, 0)
+
+
+@pytest.mark.parametrize("dow, expected", [
+    ("5-7", {0, 5, 6}),
+    ("2-7/2", {2, 4, 6}),   # the step never lands on 7
+    ("1-7/3", {0, 1, 4}),   # ...but here it does
+])
+def test_weekday_range_ending_in_7(dow, expected):
+    assert CronExpression(f"0 9 * * {dow}").weekdays == frozenset(expected)
+
+
+def test_dom_and_dow_either_matches():
+    # 13th of the month OR any Friday
+    cron = CronExpression("0 0 13 * 5")
+    assert cron.next_after(datetime(2026, 3, 1, 0, 0)) == datetime(2026, 3, 6, 0, 0)    # Friday the 6th
+    assert cron.next_after(datetime(2026, 3, 10, 0, 0)) == datetime(2026, 3, 13, 0, 0)  # Friday the 13th
+    assert cron.next_after(datetime(2026, 4, 10, 0, 0)) == datetime(2026, 4, 13, 0, 0)  # Monday the 13th
+
+
+def test_dom_only_when_dow_is_star():
+    cron = CronExpression("0 0 13 * *")
+    assert cron.next_after(datetime(2026, 3, 1, 0, 0)) == datetime(2026, 3, 13, 0, 0)
+
+
+@pytest.mark.parametrize("expr", ["* * * *", "60 * * * *", "* * * * 8", "*/0 * * * *", "5-2 * * * *"])
+def test_invalid_expressions(expr):
+    with pytest.raises(ValueError):
+        CronExpression(expr)
+
+
+# --- catch-up policies ---
+def _scheduler(tmp_path):
+    fired = []
+
+    async def handler(job):
+        fired.append(job.job_id)
+
+    return PostScheduler(handler, path=str(tmp_path / "jobs.json"), save_delay=3600), fired
+
+
+def _overdue_job(catch_up: str, down_for: float, cron: str = "* * * * *") -> ScheduledJob:
+    return ScheduledJob(guild_id=1, channel_id=2, title="t", message="m", cron=cron,
+                        catch_up=catch_up, job_id=catch_up, next_run=NOW - down_for)
+
+
+def _recover_and_run(scheduler, job):
+    """Recover one overdue job at NOW and fire everything due."""
+    async def go():
+        scheduler.jobs[job.job_id] = job
+        scheduler._recover(NOW)
+        scheduler._run_due(NOW)
+        await asyncio.gather(*scheduler._inflight)
+        if scheduler._save_handle:
+            scheduler._save_handle.cancel()
+
+    asyncio.run(go())
+
+
+# ten missed runs; with "all" the run due exactly at NOW fires as well
+@pytest.mark.parametrize("policy, expected", [("skip", 0), ("once", 1), ("all", 11)])
+def test_catch_up_policies_short_outage(tmp_path, policy, expected):
+    scheduler, fired = _scheduler(tmp_path)
+    job = _overdue_job(policy, down_for=10 * MINUTE)
+    _recover_and_run(scheduler, job)
+    assert len(fired) == expected
+    assert job.next_run > NOW
+
+
+def test_catch_up_all_is_capped_after_long_outage(tmp_path):
+    scheduler, fired = _scheduler(tmp_path)
+    job = _overdue_job("all", down_for=2 * 24 * 3600)
+    _recover_and_run(scheduler, job)
+    assert len(fired) == MAX_CATCH_UP_RUNS
+    assert job.next_run == NOW + MINUTE
+
+
+def test_recover_all_starts_at_most_recent_missed_runs(tmp_path):
+    scheduler, _ = _scheduler(tmp_path)
+    job = _overdue_job("all", down_for=30 * 24 * 3600)
+
+    async def go():
+        scheduler.jobs[job.job_id] = job
+        scheduler._recover(NOW)
+
+    asyncio.run(go())
+    assert job.next_run == NOW - MAX_CATCH_UP_RUNS * MINUTE
+
+
+def test_run_due_caps_all_replays_without_recover(tmp_path):
+    # a run that fell far behind at runtime (e.g. a long event-loop stall) is capped the same way
+    scheduler, fired = _scheduler(tmp_path)
+    job = _overdue_job("all", down_for=500 * MINUTE)
+
+    async def go():
+        scheduler.jobs[job.job_id] = job
+        scheduler._push(job)
+        scheduler._run_due(NOW)
+        await asyncio.gather(*scheduler._inflight)
+        if scheduler._save_handle:
+            scheduler._save_handle.cancel()
+
+    asyncio.run(go())
+    assert len(fired) == MAX_CATCH_UP_RUNS
+    assert job.next_run > NOW
+
+
+def test_one_shot_job_fires_once_and_is_dropped(tmp_path):
+    scheduler, fired = _scheduler(tmp_path)
+    job = ScheduledJob(guild_id=1, channel_id=2, title="t", message="m", run_at=NOW - 3600,
+                       catch_up="once", job_id="oneshot", next_run=NOW - 3600)
+    _recover_and_run(scheduler, job)
+    assert fired == ["oneshot"]
+    assert "oneshot" not in scheduler.jobs
+
+
+# --- cluster ownership ---
+def test_cluster_scheduler_only_runs_owned_jobs_and_keeps_the_rest(tmp_path):
+    owned = ScheduledJob(guild_id=1, channel_id=2, title="t", message="m", cron="0 9 * * *", job_id="owned")
+    other = ScheduledJob(guild_id=2, channel_id=3, title="t", message="m", cron="0 9 * * *", job_id="other")
+    (tmp_path / "jobs.json").write_text(json.dumps({"jobs": [asdict(owned), asdict(other)]}))
+
+    def cluster(path):
+        return PostScheduler(lambda job: None, path=str(path), owns=lambda job: job.guild_id == 1,
+                             seed_path=str(tmp_path / "jobs.json"))
+
+    # first start seeds only its own guilds from the shared file
+    first = cluster(tmp_path / "jobs.cluster0.json")
+    first.load()
+    assert set(first.jobs) == {"owned"}
+
+    # a foreign job found in the cluster's own file is not scheduled, but survives a save
+    (tmp_path / "jobs.cluster0.json").write_text((tmp_path / "jobs.json").read_text())
+    second = cluster(tmp_path / "jobs.cluster0.json")
+    second.load()
+    assert set(second.jobs) == {"owned"}
+    asyncio.run(second.save())
+    third = PostScheduler(lambda job: None, path=str(tmp_path / "jobs.cluster0.json"))
+    third.load()
+    assert set(third.jobs) == {"owned", "other"}
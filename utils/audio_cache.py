@@ -0,0 +1,153 @@
+# utils/audio_cache.py
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger("audio_cache")
+
+CACHE_DIR = os.environ.get("AUDIO_CACHE_DIR", "data/audio_cache")
+CACHE_MAX_MB = float(os.environ.get("AUDIO_CACHE_MAX_MB", 1024))
+MAX_DURATION = float(os.environ.get("AUDIO_CACHE_MAX_DURATION", 15 * 60))  # don't cache long streams / mixes
+TRANSCODE_CONCURRENCY = int(os.environ.get("AUDIO_CACHE_TRANSCODES", 1))
+OPUS_BITRATE = os.environ.get("AUDIO_CACHE_BITRATE", "128k")
+
+
+def track_key(data: dict) -> Optional[str]:
+    """Stable cache key for an extracted track, or None when the track can't be identified."""
+    ident = data.get("id")
+    if ident:
+        raw = f"{data.get('extractor_key', '')}:{ident}"
+    elif data.get("webpage_url"):
+        raw = data["webpage_url"]
+    else:
+        return None
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class OpusCache:
+    """
+    On-disk cache of tracks already transcoded to Ogg/Opus, capped by total size (least recently played evicted).
+
+    Cached files can be sent to Discord as-is (Opus passthrough), so replaying a track costs neither an
+    ffmpeg decode nor a discord.py re-encode. Tracks are transcoded in the background the first time they play.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = int(CACHE_MAX_MB * 1024 * 1024),
+                 volume: float = 1.0):
+        self.dir = Path(cache_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.volume = volume  # gain baked into cached files so passthrough matches the default volume
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key -> size, oldest access first
+        self._pending = {}
+        self._semaphore = asyncio.Semaphore(TRANSCODE_CONCURRENCY)
+        self._scan()
+
+    def _scan(self):
+        for tmp in self.dir.glob("*.part"):
+            # interrupted transcodes; fresh ones may belong to another cluster process still writing them
+            try:
+                if time.time() - tmp.stat().st_mtime > 600:
+                    tmp.unlink(missing_ok=True)
+            except OSError:
+                pass
+        files = sorted(self.dir.glob("*.ogg"), key=lambda p: p.stat().st_mtime)
+        for path in files:
+            self._index[path.stem] = path.stat().st_size
+        self._evict()
+
+    @property
+    def size(self) -> int:
+        return sum(self._index.values())
+
+    def _path(self, key: str) -> Path:
+        return self.dir / f"{key}.ogg"
+
+    def lookup(self, data: dict) -> Optional[Path]:
+        """Path of the cached Opus file for this track, marking it recently used."""
+        key = track_key(data)
+        if key is None or key not in self._index:
+            return None
+        path = self._path(key)
+        if not path.exists():
+            del self._index[key]
+            return None
+        self._index.move_to_end(key)
+        try:
+            os.utime(path)  # keep LRU order across restarts
+        except OSError:
+            pass
+        return path
+
+    def schedule(self, data: dict):
+        """Transcode this track into the cache in the background, if it's worth caching."""
+        key = track_key(data)
+        if key is None or key in self._index or key in self._pending or not data.get("url"):
+            return
+        duration = data.get("duration")
+        if data.get("is_live") or not duration or duration > MAX_DURATION:
+            return
+        task = asyncio.create_task(self._transcode(key, data["url"]))
+        self._pending[key] = task
+        task.add_done_callback(lambda _: self._pending.pop(key, None))
+
+    async def _transcode(self, key: str, source_url: str):
+        async with self._semaphore:
+            final = self._path(key)
+            tmp = final.with_name(f"{key}.{os.getpid()}.part")  # cluster processes may transcode the same track
+            cmd = [
+                "ffmpeg", "-nostdin", "-loglevel", "error",
+                "-reconnect", "1", "-reconnect_streamed", "1", "-reconnect_delay_max", "5",
+                "-i", source_url, "-vn",
+                "-filter:a", f"volume={self.volume}",
+                "-c:a", "libopus", "-b:a", OPUS_BITRATE, "-ar", "48000", "-ac", "2",
+                "-f", "ogg", "-y", str(tmp),
+            ]
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *cmd, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+                )
+            except Exception as e:
+                logger.warning("Could not start ffmpeg for audio cache: %s", e)
+                return
+            try:
+                _, stderr = await proc.communicate()
+            except asyncio.CancelledError:
+                # shutdown/unload: don't leave ffmpeg downloading and encoding in the background
+                if proc.returncode is None:
+                    proc.kill()
+                    await proc.wait()
+                tmp.unlink(missing_ok=True)
+                raise
+            if proc.returncode != 0:
+                logger.warning("Transcode of %s failed: %s", key, stderr.decode(errors="replace")[-300:])
+                tmp.unlink(missing_ok=True)
+                return
+            try:
+                os.replace(tmp, final)
+            except OSError as e:
+                logger.warning("Could not move transcode of %s into the cache: %s", key, e)
+                tmp.unlink(missing_ok=True)
+                return
+            self._index[key] = final.stat().st_size
+            self._evict(keep=key)
+            logger.info("Cached %s (%.1f MB, cache now %.1f MB)", key, self._index.get(key, 0) / 1e6, self.size / 1e6)
+
+    def _evict(self, keep: str = None):
+        total = self.size
+        for key in list(self._index):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= self._index.pop(key)
+            self._path(key).unlink(missing_ok=True)
+
+    def shutdown(self):
+        for task in list(self._pending.values()):
+            task.cancel()
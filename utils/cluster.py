@@ -0,0 +1,167 @@
+# utils/cluster.py
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from typing import Callable, List, Optional
+
+import aiohttp
+
+from utils.shared_state import IPCServer, LocalState
+from utils.webserver import start_webserver
+
+logger = logging.getLogger("cluster")
+
+IPC_HOST = os.environ.get("IPC_HOST", "127.0.0.1")
+IPC_PORT = int(os.environ.get("IPC_PORT", 8765))
+HEALTH_INTERVAL = float(os.environ.get("CLUSTER_HEALTH_INTERVAL", 15))
+READY_TIMEOUT_PER_SHARD = 30.0  # how long to wait for a cluster before starting the next one anyway
+RESTART_BACKOFF_MAX = 300.0
+
+
+async def fetch_recommended_shards(token: str) -> int:
+    """Ask Discord how many shards this bot should run."""
+    headers = {"Authorization": f"Bot {token}"}
+    async with aiohttp.ClientSession() as session:
+        async with session.get("https://discord.com/api/v10/gateway/bot", headers=headers) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+    return int(data["shards"])
+
+
+def split_shards(total_shards: int, clusters: int) -> List[List[int]]:
+    """Contiguous shard ranges, as even as possible: split_shards(10, 3) -> [[0..3], [4..6], [7..9]]."""
+    clusters = max(1, min(clusters, total_shards))
+    base, extra = divmod(total_shards, clusters)
+    ranges, start = [], 0
+    for i in range(clusters):
+        size = base + (1 if i < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+
+class _ClusterProcess:
+    def __init__(self, cluster_id: int, shard_ids: List[int]):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.process: Optional[multiprocessing.Process] = None
+        self.restarts = 0
+        self.next_start = 0.0
+
+
+class ClusterLauncher:
+    """
+    Runs N bot processes, each owning a contiguous range of shards.
+
+    The launcher owns the public webserver (so /health covers every cluster) and the local IPC server that
+    holds cross-cluster state. Clusters are started one after another, waiting for each to report ready,
+    so they don't trip Discord's identify rate limit. Crashed clusters are restarted with exponential backoff.
+    """
+
+    def __init__(self, target: Callable, cluster_count: int, total_shards: int, port: int):
+        self.target = target  # target(cluster_id, shard_ids, total_shards, ipc_address) runs one cluster
+        self.total_shards = total_shards
+        self.port = port
+        self.state = LocalState()
+        self.ipc = IPCServer(self.state, IPC_HOST, IPC_PORT)
+        self.clusters = [_ClusterProcess(i, ids) for i, ids in enumerate(split_shards(total_shards, cluster_count))]
+        self._ctx = multiprocessing.get_context("spawn")
+        self._stopping = False
+
+    def _spawn(self, cluster: _ClusterProcess):
+        cluster.process = self._ctx.Process(
+            target=self.target,
+            args=(cluster.cluster_id, cluster.shard_ids, self.total_shards, f"{IPC_HOST}:{IPC_PORT}"),
+            name=f"lagoona-cluster-{cluster.cluster_id}",
+            daemon=False,
+        )
+        cluster.process.start()
+        logger.info("Started cluster %d (pid %s) with shards %s", cluster.cluster_id, cluster.process.pid, cluster.shard_ids)
+
+    def _is_ready(self, cluster: _ClusterProcess) -> bool:
+        snap = self.state.health_snapshot().get(str(cluster.cluster_id))
+        return bool(snap and snap.get("ready"))
+
+    async def _wait_ready(self, cluster: _ClusterProcess):
+        deadline = time.monotonic() + READY_TIMEOUT_PER_SHARD * len(cluster.shard_ids)
+        while time.monotonic() < deadline and not self._stopping:
+            if self._is_ready(cluster) or not cluster.process.is_alive():
+                return
+            await asyncio.sleep(1)
+        logger.warning("Cluster %d not ready in time; starting the next one anyway", cluster.cluster_id)
+
+    async def run(self):
+        await self.ipc.start()
+        threading.Thread(
+            target=start_webserver, kwargs={"port": self.port, "health_source": self.state.health_snapshot}, daemon=True
+        ).start()
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except NotImplementedError:  # Windows
+                pass
+
+        for cluster in self.clusters:
+            if self._stopping:
+                break
+            self._spawn(cluster)
+            await self._wait_ready(cluster)
+
+        while not self._stopping:
+            await asyncio.sleep(5)
+            self._supervise()
+
+        await self._shutdown()
+
+    def _supervise(self):
+        now = time.monotonic()
+        for cluster in self.clusters:
+            proc = cluster.process
+            if proc is not None and proc.is_alive():
+                if cluster.restarts and self._is_ready(cluster):
+                    cluster.restarts = 0  # came back healthy; old crashes shouldn't lengthen the next backoff
+                continue
+            if proc is not None:
+                # first time we notice the exit: schedule a restart with backoff
+                cluster.restarts += 1
+                delay = min(RESTART_BACKOFF_MAX, 5 * 2 ** min(cluster.restarts, 6))
+                cluster.next_start = now + delay
+                cluster.process = None
+                logger.error("Cluster %d exited with code %s; restarting in %.0fs",
+                             cluster.cluster_id, proc.exitcode, delay)
+                self.state.forget_health(cluster.cluster_id)
+                continue
+            if now >= cluster.next_start:
+                self._spawn(cluster)
+
+    def stop(self):
+        logger.info("Stopping clusters…")
+        self._stopping = True
+
+    async def _shutdown(self):
+        for cluster in self.clusters:
+            if cluster.process and cluster.process.is_alive():
+                cluster.process.terminate()
+        for cluster in self.clusters:
+            if cluster.process:
+                await asyncio.to_thread(cluster.process.join, 15)
+                if cluster.process.is_alive():
+                    cluster.process.kill()
+        await self.ipc.close()
+
+
+def run_launcher(target: Callable, cluster_count: int, token: str, port: int):
+    async def _main():
+        total = os.environ.get("TOTAL_SHARDS")
+        total_shards = int(total) if total else await fetch_recommended_shards(token)
+        launcher = ClusterLauncher(target, cluster_count, total_shards, port)
+        logger.info("Launching %d clusters for %d shards", len(launcher.clusters), total_shards)
+        await launcher.run()
+
+    asyncio.run(_main())
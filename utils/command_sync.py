@@ -0,0 +1,41 @@
+# utils/command_sync.py
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+from discord import app_commands
+
+logger = logging.getLogger("command_sync")
+
+HASH_FILE = os.environ.get("COMMAND_HASH_FILE", "data/command_tree.sha256")
+
+
+def command_tree_hash(tree: app_commands.CommandTree, application_id=None) -> str:
+    """Stable hash of the global slash-command payload Discord would receive on sync."""
+    payload = sorted(
+        (cmd.to_dict(tree) for cmd in tree.get_commands()),
+        key=lambda d: (d.get("type", 1), d["name"]),
+    )
+    raw = json.dumps({"app": application_id, "commands": payload}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+async def sync_if_changed(tree: app_commands.CommandTree, application_id=None, path: str = HASH_FILE) -> bool:
+    """
+    Sync global commands only when the tree differs from the last successful sync.
+    Set FORCE_COMMAND_SYNC=1 to always sync. Returns True when a sync happened.
+    """
+    hash_path = Path(path)
+    current = command_tree_hash(tree, application_id)
+    previous = hash_path.read_text(encoding="utf-8").strip() if hash_path.exists() else None
+    if current == previous and os.environ.get("FORCE_COMMAND_SYNC") != "1":
+        logger.info("Slash command tree unchanged (%s); skipping sync.", current[:12])
+        return False
+
+    await tree.sync()
+    hash_path.parent.mkdir(parents=True, exist_ok=True)
+    hash_path.write_text(current, encoding="utf-8")
+    logger.info("Slash commands synced (%s).", current[:12])
+    return True
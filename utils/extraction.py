@@ -0,0 +1,152 @@
+# utils/extraction.py
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger("extraction")
+
+EXTRACT_WORKERS = int(os.environ.get("YTDL_WORKERS", 2))
+EXTRACT_TIMEOUT = float(os.environ.get("YTDL_TIMEOUT", 30))       # seconds a caller waits for an extraction
+SOCKET_TIMEOUT = float(os.environ.get("YTDL_SOCKET_TIMEOUT", 10))  # per network read inside yt_dlp itself
+CACHE_SIZE = int(os.environ.get("YTDL_CACHE_SIZE", 256))          # metadata entries kept
+DEFAULT_TTL = float(os.environ.get("YTDL_CACHE_TTL", 60 * 60))    # used when a stream URL has no expiry hint
+EXPIRY_MARGIN = 120.0  # treat stream URLs as stale this long before they actually expire
+
+
+def stream_expiry(data: dict, now: float) -> float:
+    """Best guess at when the stream URL in `data` stops working (googlevideo URLs carry `expire=`)."""
+    url = data.get("url") or ""
+    try:
+        expire = parse_qs(urlparse(url).query).get("expire")
+        if expire:
+            return float(expire[0]) - EXPIRY_MARGIN
+    except ValueError:
+        pass
+    return now + DEFAULT_TTL
+
+
+class ExtractionPool:
+    """
+    Bounded worker pool dedicated to yt_dlp extraction.
+
+    - Each worker thread owns its own YoutubeDL instance, so extractions don't share mutable state.
+    - Results are kept in an LRU cache that evicts entries once their stream URL is about to expire.
+    - Concurrent requests for the same URL join a single in-flight extraction.
+    - Callers stop waiting after EXTRACT_TIMEOUT, and a cancelled request that hasn't started yet never runs.
+      A running extraction can't be interrupted from outside its thread, so yt_dlp gets its own socket
+      timeout and a small retry budget to make stalled workers give up and free the pool.
+    """
+
+    def __init__(self, options: dict, workers: int = EXTRACT_WORKERS, timeout: float = EXTRACT_TIMEOUT,
+                 cache_size: int = CACHE_SIZE):
+        # socket_timeout/retries first so callers can override them
+        self.options = {"socket_timeout": SOCKET_TIMEOUT, "retries": 2, "extractor_retries": 1, **options}
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ytdl")
+        self._local = threading.local()
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()  # url -> (expires_at, data)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    # --- worker side ---
+    def _ytdl(self):
+        ytdl = getattr(self._local, "ytdl", None)
+        if ytdl is None:
+            # imported on first extraction so boots (and guilds that never use voice) don't pay for yt_dlp
+            import yt_dlp
+            yt_dlp.utils.bug_reports_message = lambda *_, **__: ""  # suppress yt_dlp console spam
+            ytdl = self._local.ytdl = yt_dlp.YoutubeDL(self.options)
+        return ytdl
+
+    def _extract_sync(self, url: str, download: bool) -> dict:
+        data = self._ytdl().extract_info(url, download=download)
+        if not data:
+            raise ValueError(f"Could not extract audio from {url!r}")
+        if "entries" in data:
+            entries = [e for e in data["entries"] if e]
+            if not entries:
+                raise ValueError(f"No playable entries for {url!r}")
+            data = entries[0]
+        return data
+
+    def prepare_filename(self, data: dict) -> str:
+        return self._ytdl().prepare_filename(data)
+
+    # --- cache ---
+    def cached(self, url: str) -> Optional[dict]:
+        entry = self._cache.get(url)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        if expires_at <= time.time():
+            del self._cache[url]
+            return None
+        self._cache.move_to_end(url)
+        return data
+
+    def _store(self, url: str, data: dict):
+        self._cache[url] = (stream_expiry(data, time.time()), data)
+        self._cache.move_to_end(url)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    # --- public API ---
+    async def extract(self, url: str, *, download: bool = False) -> dict:
+        """Return extracted metadata for `url`, from cache when the stream URL is still fresh."""
+        loop = asyncio.get_running_loop()
+        if download:
+            # downloads write files; never share or cache them
+            fut = loop.run_in_executor(self._executor, self._extract_sync, url, True)
+            return await asyncio.wait_for(fut, timeout=self.timeout)
+
+        data = self.cached(url)
+        if data is not None:
+            self.hits += 1
+            return data
+
+        task = self._inflight.get(url)
+        if task is None:
+            self.misses += 1
+            task = self._inflight[url] = loop.create_task(self._run(url))
+        self._waiters[url] = self._waiters.get(url, 0) + 1
+        try:
+            # shield: one caller giving up must not cancel the extraction others are waiting on
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters.get(url) == 1 and not task.done():
+                task.cancel()  # last interested caller left
+            raise
+        finally:
+            self._waiters[url] -= 1
+            if not self._waiters[url]:
+                del self._waiters[url]
+
+    async def _run(self, url: str) -> dict:
+        loop = asyncio.get_running_loop()
+        try:
+            fut = loop.run_in_executor(self._executor, self._extract_sync, url, False)
+            data = await asyncio.wait_for(fut, timeout=self.timeout)
+            self._store(url, data)
+            return data
+        except asyncio.TimeoutError:
+            logger.warning("Extraction of %r timed out after %.0fs", url, self.timeout)
+            raise
+        finally:
+            self._inflight.pop(url, None)
+
+    def invalidate(self, url: str):
+        self._cache.pop(url, None)
+
+    def shutdown(self):
+        for task in list(self._inflight.values()):
+            task.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
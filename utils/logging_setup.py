@@ -0,0 +1,173 @@
+# utils/logging_setup.py
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json").lower()             # json | text
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+LOG_RATE_LIMIT = int(os.environ.get("LOG_RATE_LIMIT", 20))            # identical messages per window before sampling
+LOG_RATE_WINDOW = float(os.environ.get("LOG_RATE_WINDOW", 60))        # seconds
+LOG_SAMPLE_EVERY = int(os.environ.get("LOG_SAMPLE_EVERY", 100))       # past the limit, keep 1 in N
+MAX_FIELD_CHARS = int(os.environ.get("LOG_MAX_FIELD_CHARS", 500))
+
+_listener = None
+
+
+def truncate(value, limit: int = MAX_FIELD_CHARS) -> str:
+    """repr-ish string for logging large payloads without dumping them whole."""
+    text = value if isinstance(value, str) else repr(value)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}… ({len(text) - limit} more chars)"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; runs on the writer thread, so tracebacks are formatted off the event loop."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Per-logger throttle for repeated messages (keyed by logger, level and message template).
+
+    The first LOG_RATE_LIMIT occurrences in each window pass; after that only 1 in LOG_SAMPLE_EVERY does,
+    without its traceback. The next record that passes carries a count of what was suppressed.
+    """
+
+    def __init__(self, limit: int = LOG_RATE_LIMIT, window: float = LOG_RATE_WINDOW, sample_every: int = LOG_SAMPLE_EVERY):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.sample_every = max(1, sample_every)
+        self._lock = threading.Lock()
+        self._counters = {}  # key -> [window_start, seen, suppressed]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.levelno, record.msg if isinstance(record.msg, str) else type(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None or now - counter[0] >= self.window:
+                suppressed = counter[2] if counter else 0
+                self._counters[key] = [now, 1, 0]
+                if len(self._counters) > 5000:
+                    self._prune(now)
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            counter[1] += 1
+            if counter[1] <= self.limit:
+                return True
+            over = counter[1] - self.limit
+            if over % self.sample_every:
+                counter[2] += 1
+                return False
+            record.suppressed, counter[2] = counter[2], 0
+        # sampled record: keep the line, skip the (expensive, repeated) traceback
+        record.exc_info = None
+        record.exc_text = None
+        return True
+
+    def _prune(self, now: float):
+        for key in [k for k, c in self._counters.items() if now - c[0] >= self.window and not c[2]]:
+            del self._counters[key]
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks the caller: no formatting here, and a full queue drops the record."""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # resolve %-args now (they may be mutated later) but leave traceback formatting to the writer thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            NonBlockingQueueHandler.dropped += 1
+
+
+class _DrainingQueueListener(logging.handlers.QueueListener):
+    """QueueListener whose stop() waits for room in the bounded queue instead of failing when it's full."""
+
+    def enqueue_sentinel(self):
+        # the writer thread is still draining, so space frees up; at exit a full queue is likely (error storms)
+        self.queue.put(self._sentinel, timeout=10)
+
+
+class _SuppressedTextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        return f"{text} [+{suppressed} similar suppressed]" if suppressed else text
+
+
+def setup_logging(level: str = "INFO"):
+    """
+    Route all logging through a bounded queue drained by a background writer thread.
+    Safe to call more than once; later calls only change the level.
+    """
+    global _listener
+    root = logging.getLogger()
+    root.setLevel(level)
+    if _listener is not None:
+        return _listener
+
+    stream = logging.StreamHandler()
+    if LOG_FORMAT == "text":
+        stream.setFormatter(_SuppressedTextFormatter("%(asctime)s %(levelname)s:%(name)s:%(message)s"))
+    else:
+        stream.setFormatter(JsonFormatter())
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(RateLimitFilter())
+
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+
+    _listener = _DrainingQueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_stop_listener)
+    return _listener
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        try:
+            _listener.stop()  # flushes whatever is still queued
+        except queue.Full:
+            sys.stderr.write("logging: writer thread stuck; queued records lost at exit\n")
+        _listener = None
+    if NonBlockingQueueHandler.dropped:
+        sys.stderr.write(f"logging: dropped {NonBlockingQueueHandler.dropped} records (queue full)\n")
@@ -0,0 +1,106 @@
+# utils/member_cache.py
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import discord
+
+logger = logging.getLogger("member_cache")
+
+# full: chunk every guild at startup and keep every member (discord.py default, highest memory)
+# lazy: cache nothing; single members come from REST, name searches from uncached gateway member queries
+# none: never ask the gateway for members; single members are fetched over REST when needed
+MEMBER_CACHE = os.environ.get("MEMBER_CACHE", "lazy").lower()
+FETCH_CACHE_SIZE = int(os.environ.get("MEMBER_FETCH_CACHE", 2000))
+FETCH_CACHE_TTL = 10 * 60.0
+MAX_SEARCH_RESULTS = 100  # gateway member queries are capped at 100 results anyway
+
+
+def client_options(mode: str = MEMBER_CACHE) -> dict:
+    """Client kwargs (member_cache_flags / chunk_guilds_at_startup) for the configured strategy."""
+    if mode == "full":
+        return {"member_cache_flags": discord.MemberCacheFlags.all(), "chunk_guilds_at_startup": True}
+    if mode not in ("lazy", "none"):
+        logger.warning("Unknown MEMBER_CACHE=%r; using 'lazy'", mode)
+    # voice states are still tracked so voice features see who is in a channel
+    flags = discord.MemberCacheFlags.none()
+    flags.voice = True
+    return {"member_cache_flags": flags, "chunk_guilds_at_startup": False}
+
+
+class MemberResolver:
+    """
+    Gets members without keeping every guild fully cached.
+
+    `get_member` checks the gateway cache, then a small TTL/LRU of members fetched over REST, then fetches.
+    `search_members` finds members by name prefix without caching the results (or the rest of the guild).
+    """
+
+    def __init__(self, bot: discord.Client, mode: str = MEMBER_CACHE):
+        self.bot = bot
+        self.mode = mode
+        self._fetched: "OrderedDict[tuple, tuple]" = OrderedDict()  # (guild_id, user_id) -> (stored_at, member)
+        self.fetches = 0
+        self.queries = 0
+
+    def _remember(self, member: discord.Member):
+        key = (member.guild.id, member.id)
+        self._fetched[key] = (time.monotonic(), member)
+        self._fetched.move_to_end(key)
+        while len(self._fetched) > FETCH_CACHE_SIZE:
+            self._fetched.popitem(last=False)
+
+    def _recall(self, guild_id: int, user_id: int) -> Optional[discord.Member]:
+        entry = self._fetched.get((guild_id, user_id))
+        if entry is None:
+            return None
+        stored_at, member = entry
+        if time.monotonic() - stored_at > FETCH_CACHE_TTL:
+            del self._fetched[(guild_id, user_id)]
+            return None
+        self._fetched.move_to_end((guild_id, user_id))
+        return member
+
+    async def get_member(self, guild: discord.Guild, user_id: int) -> Optional[discord.Member]:
+        """Member from cache, or fetched over REST; None if they're not in the guild."""
+        member = guild.get_member(user_id) or self._recall(guild.id, user_id)
+        if member is not None:
+            return member
+        try:
+            self.fetches += 1
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
+            return None
+        self._remember(member)
+        return member
+
+    async def search_members(self, guild: discord.Guild, prefix: str,
+                             limit: int = MAX_SEARCH_RESULTS) -> Optional[List[discord.Member]]:
+        """
+        Members whose username or nickname starts with `prefix` (case-insensitive), up to `limit`.
+        Uses the member cache when the guild is fully cached; otherwise asks the gateway with cache=False,
+        so a search never leaves the guild's member list in memory. None when the strategy doesn't allow it.
+        """
+        if guild.chunked:
+            needle = prefix.lower()
+            matches = [m for m in guild.members
+                       if m.name.lower().startswith(needle) or (m.nick and m.nick.lower().startswith(needle))]
+            return matches[:limit]
+        if self.mode == "none":
+            return None
+        self.queries += 1
+        try:
+            return await guild.query_members(query=prefix, limit=min(limit, MAX_SEARCH_RESULTS), cache=False)
+        except asyncio.TimeoutError:
+            logger.warning("Member query in guild %s timed out", guild.id)
+            return []
+
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.forget_guild(guild.id)
+
+    def forget_guild(self, guild_id: int):
+        for key in [k for k in self._fetched if k[0] == guild_id]:
+            del self._fetched[key]
@@ -0,0 +1,210 @@
+# utils/outbound.py
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+import aiohttp
+import discord
+
+from utils.tracing import tracer, activate
+
+logger = logging.getLogger("outbound")
+
+# Discord buckets message routes by their major parameter (the channel id), so we key queues the same way.
+_ROUTE_PATTERNS = (
+    ("reaction", re.compile(r"/channels/(\d+)/messages/\d+/reactions/")),
+    ("edit", re.compile(r"/channels/(\d+)/messages/\d+$")),
+    ("send", re.compile(r"/channels/(\d+)/messages$")),
+)
+_METHODS = {"reaction": "PUT", "edit": "PATCH", "send": "POST"}
+
+BucketKey = Tuple[str, int]
+
+
+def bucket_for_url(method: str, path: str) -> Optional[BucketKey]:
+    """Map a Discord REST request onto our (route, channel_id) bucket key, or None if we don't queue it."""
+    for route, pattern in _ROUTE_PATTERNS:
+        m = pattern.search(path)
+        if m and _METHODS[route] == method:
+            return route, int(m.group(1))
+    return None
+
+
+class _Bucket:
+    __slots__ = ("remaining", "reset_at", "queue", "worker")
+
+    def __init__(self):
+        self.remaining: Optional[int] = None  # from X-RateLimit-Remaining; None until we've seen a response
+        self.reset_at = 0.0                   # monotonic time the bucket refills
+        self.queue: Deque["_Action"] = deque()
+        self.worker: Optional[asyncio.Task] = None
+
+
+class _Action:
+    __slots__ = ("message_id", "run", "future", "coalesce_key", "superseded", "trace_parent", "queued_at")
+
+    def __init__(self, message_id: Optional[int], run: Callable, coalesce_key=None):
+        self.message_id = message_id  # message the action targets; None for plain channel sends
+        self.run = run
+        self.future = asyncio.get_running_loop().create_future()
+        self.coalesce_key = coalesce_key
+        self.superseded = False
+        self.trace_parent = tracer.current()  # the span that queued this action (e.g. the incoming message)
+        self.queued_at = time.monotonic()
+
+
+class OutboundScheduler:
+    """
+    Shared queue for outbound reactions, edits and replies.
+
+    Actions are queued per Discord rate-limit bucket (route + channel) and each bucket is drained by its own
+    worker, so a busy channel never blocks handlers or other channels. Pacing comes from the
+    X-RateLimit-* headers of real responses (collected through an aiohttp trace hooked into the bot's HTTP client).
+    Pending edits to the same message are coalesced into the latest one, and actions for deleted messages are dropped.
+    """
+
+    def __init__(self, deleted_cache_size: int = 5000):
+        self._buckets: Dict[BucketKey, _Bucket] = {}
+        self._pending_edits: Dict[int, _Action] = {}
+        self._deleted: "OrderedDict[int, None]" = OrderedDict()
+        self._deleted_cache_size = deleted_cache_size
+        self.trace_config = aiohttp.TraceConfig()
+        self.trace_config.on_request_end.append(self._on_request_end)
+
+    # --- rate-limit header tracking ---
+    async def _on_request_end(self, session, ctx, params: aiohttp.TraceRequestEndParams):
+        key = bucket_for_url(params.method, params.url.path)
+        if key is None:
+            return
+        headers = params.response.headers
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset_after = headers.get("X-RateLimit-Reset-After") or headers.get("Retry-After")
+        if remaining is None and reset_after is None:
+            return
+        # only buckets we're draining; sends made outside the queue would otherwise leave one entry per channel
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return
+        if remaining is not None:
+            bucket.remaining = int(remaining)
+        if params.response.status == 429:
+            bucket.remaining = 0
+        if reset_after is not None:
+            bucket.reset_at = time.monotonic() + float(reset_after)
+
+    async def _wait_for_bucket(self, bucket: _Bucket):
+        if bucket.remaining == 0:
+            delay = bucket.reset_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            bucket.remaining = None  # refilled; next response tells us the real count
+
+    # --- deleted message tracking ---
+    def mark_deleted(self, message_id: int):
+        self._deleted[message_id] = None
+        if len(self._deleted) > self._deleted_cache_size:
+            self._deleted.popitem(last=False)
+        pending = self._pending_edits.pop(message_id, None)
+        if pending and not pending.future.done():
+            pending.future.set_result(None)
+
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        self.mark_deleted(payload.message_id)
+
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        for message_id in payload.message_ids:
+            self.mark_deleted(message_id)
+
+    # --- queueing ---
+    def _enqueue(self, key: BucketKey, action: _Action) -> asyncio.Future:
+        bucket = self._buckets.setdefault(key, _Bucket())
+        bucket.queue.append(action)
+        if bucket.worker is None or bucket.worker.done():
+            bucket.worker = asyncio.create_task(self._drain(key, bucket), name=f"outbound-{key[0]}-{key[1]}")
+        return action.future
+
+    async def _drain(self, key: BucketKey, bucket: _Bucket):
+        while bucket.queue:
+            action = bucket.queue.popleft()
+            if action.future.done() or action.superseded:
+                continue  # dropped (deleted message) or replaced by a newer edit
+            if self._pending_edits.get(action.coalesce_key) is action:
+                del self._pending_edits[action.coalesce_key]
+            if action.message_id in self._deleted:
+                action.future.set_result(None)
+                continue
+            await self._wait_for_bucket(bucket)
+            span = tracer.child(action.trace_parent, f"outbound.{key[0]}", **{
+                "discord.channel_id": key[1],
+                "queue.wait_ms": round((time.monotonic() - action.queued_at) * 1000, 3),
+            })
+            try:
+                with activate(action.trace_parent), span:
+                    result = await action.run()
+            except Exception as e:
+                if isinstance(e, discord.NotFound) and action.message_id is not None:
+                    self.mark_deleted(action.message_id)  # the target message is gone
+                    result = None
+                else:
+                    logger.warning("Outbound %s action in channel %s failed: %s", key[0], key[1], e)
+                    if not action.future.done():
+                        action.future.set_exception(e)
+                        action.future.exception()  # mark retrieved; fire-and-forget callers don't await
+                    continue
+            if not action.future.done():
+                action.future.set_result(result)
+        if bucket.queue:
+            return
+        delay = bucket.reset_at - time.monotonic()
+        if bucket.remaining == 0 and delay > 0:
+            # still exhausted: keep the state so a new action waits for the refill, then forget the bucket
+            asyncio.get_running_loop().call_later(delay, self._forget_idle, key, bucket)
+        else:
+            self._buckets.pop(key, None)
+
+    def _forget_idle(self, key: BucketKey, bucket: _Bucket):
+        if self._buckets.get(key) is bucket and not bucket.queue and (bucket.worker is None or bucket.worker.done()):
+            del self._buckets[key]
+
+    # --- public API ---
+    def react(self, message: discord.Message, *emojis) -> asyncio.Future:
+        """Queue one reaction per emoji; resolves when the last one has been added."""
+        future = None
+        for emoji in emojis:
+            future = self._enqueue(
+                ("reaction", message.channel.id),
+                _Action(message.id, lambda e=emoji: message.add_reaction(e)),
+            )
+        return future
+
+    def edit(self, message: discord.Message, **kwargs: Any) -> asyncio.Future:
+        """Queue an edit. A newer edit to the same message replaces a pending one."""
+        previous = self._pending_edits.get(message.id)
+        action = _Action(message.id, lambda: message.edit(**kwargs), coalesce_key=message.id)
+        self._pending_edits[message.id] = action
+        if previous and not previous.future.done():
+            # the superseded edit never runs; it resolves with the result of the one that replaced it
+            previous.superseded = True
+            action.future.add_done_callback(lambda f: previous.future.done() or _chain(f, previous.future))
+        return self._enqueue(("edit", message.channel.id), action)
+
+    def reply(self, message: discord.Message, **kwargs: Any) -> asyncio.Future:
+        """Queue a reply to `message`. Dropped if the message is deleted before it is sent."""
+        return self._enqueue(("send", message.channel.id), _Action(message.id, lambda: message.reply(**kwargs)))
+
+    def send(self, channel: discord.abc.Messageable, **kwargs: Any) -> asyncio.Future:
+        """Queue a plain channel send."""
+        return self._enqueue(("send", channel.id), _Action(None, lambda: channel.send(**kwargs)))
+
+
+def _chain(source: asyncio.Future, target: asyncio.Future):
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+        target.exception()
+    else:
+        target.set_result(source.result())
@@ -0,0 +1,368 @@
+# utils/scheduler.py
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import random
+import time
+import uuid
+from collections import deque
+from functools import lru_cache
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import pytz
+
+logger = logging.getLogger("scheduler")
+
+CATCH_UP_POLICIES = ("skip", "once", "all")
+MAX_CATCH_UP_RUNS = 24  # cap for the "all" policy so a long outage can't flood a channel
+SCHEDULER_FILE = os.environ.get("SCHEDULER_FILE", "data/scheduled_posts.json")
+
+
+# --- Cron parsing ---
+class CronExpression:
+    """
+    Minimal 5-field cron expression: minute hour day-of-month month day-of-week.
+    Supports '*', '*/n', 'a-b', 'a-b/n' and comma lists. Day-of-week uses 0=Sunday (7 also works).
+    """
+    RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+    def __init__(self, expr: str):
+        parts = expr.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression needs 5 fields, got {len(parts)}: {expr!r}")
+        self.expr = expr
+        fields = [self._parse_field(p, lo, hi) for p, (lo, hi) in zip(parts, self.RANGES)]
+        self.minutes, self.hours, self.days, self.months, self.weekdays = fields
+        # standard cron: if both dom and dow are restricted, either may match
+        self.dom_any = parts[2] == "*"
+        self.dow_any = parts[4] == "*"
+
+    @staticmethod
+    def _parse_field(text: str, lo: int, hi: int) -> frozenset:
+        values = set()
+        for chunk in text.split(","):
+            step = 1
+            if "/" in chunk:
+                chunk, step_text = chunk.split("/", 1)
+                step = int(step_text)
+                if step <= 0:
+                    raise ValueError(f"Invalid cron step: {step_text!r}")
+            if chunk == "*":
+                start, end = lo, hi
+            elif "-" in chunk:
+                a, b = chunk.split("-", 1)
+                start, end = int(a), int(b)
+            else:
+                start = int(chunk)
+                end = hi if step > 1 else start
+            if hi == 6 and start == end == 7:
+                start = end = 0  # "7" on its own is Sunday
+            if hi == 6 and end == 7:
+                # allow 7 as Sunday, unless the step skips it (e.g. "2-7/2")
+                if 7 in range(start, end + 1, step):
+                    values.add(0)
+                end = 6
+            if start < lo or end > hi or start > end:
+                raise ValueError(f"Cron field {text!r} out of range {lo}-{hi}")
+            values.update(range(start, end + 1, step))
+        return frozenset(values)
+
+    def _day_matches(self, dt: datetime) -> bool:
+        dom = dt.day in self.days
+        dow = (dt.isoweekday() % 7) in self.weekdays
+        if self.dom_any and self.dow_any:
+            return True
+        if self.dom_any:
+            return dow
+        if self.dow_any:
+            return dom
+        return dom or dow
+
+    def next_after(self, after: datetime) -> datetime:
+        """Return the first naive wall-clock datetime strictly after `after` that matches."""
+        dt = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * 5)
+        while dt < limit:
+            if dt.month not in self.months:
+                year, month = (dt.year + 1, 1) if dt.month == 12 else (dt.year, dt.month + 1)
+                dt = dt.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(dt):
+                dt = (dt + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if dt.hour not in self.hours:
+                dt = (dt + timedelta(hours=1)).replace(minute=0)
+                continue
+            if dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+                continue
+            return dt
+        raise ValueError(f"Cron expression never fires: {self.expr!r}")
+
+
+@lru_cache(maxsize=1024)
+def parse_cron(expr: str) -> CronExpression:
+    # many jobs share a handful of expressions ("0 9 * * *"), so parse each once
+    return CronExpression(expr)
+
+
+# --- Jobs ---
+@dataclass
+class ScheduledJob:
+    guild_id: int
+    channel_id: int
+    title: str
+    message: str
+    cron: Optional[str] = None        # recurring when set
+    run_at: Optional[float] = None    # one-shot unix timestamp when cron is None
+    tz: str = "UTC"
+    jitter: float = 0.0               # max random delay (seconds) added to each run
+    catch_up: str = "once"            # skip | once | all
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex[:10])
+    next_run: Optional[float] = None  # scheduled (un-jittered) unix timestamp of the next run
+    last_run: Optional[float] = None
+
+    def compute_next(self, after: float) -> Optional[float]:
+        """Next un-jittered fire time strictly after `after`, or None when the job is finished."""
+        if not self.cron:
+            return self.run_at if self.run_at is not None and self.run_at > after else None
+        zone = pytz.timezone(self.tz)
+        local = datetime.fromtimestamp(after, zone).replace(tzinfo=None)
+        nxt = parse_cron(self.cron).next_after(local)
+        return zone.localize(nxt).timestamp()
+
+
+def _last_runs_before(job: ScheduledJob, first: float, now: float, limit: int) -> List[float]:
+    """
+    The last `limit` runs of a cron job in [first, now). Walks forward from a lookback window that grows
+    until it holds `limit` runs (or reaches `first`), so a long outage doesn't mean stepping through every run.
+    """
+    lookback = 3600.0
+    while True:
+        since = now - lookback
+        if since <= first:
+            runs = deque([first], maxlen=limit)
+            t = job.compute_next(first)
+        else:
+            runs = deque(maxlen=limit)
+            t = job.compute_next(since)
+        while t is not None and t < now:
+            runs.append(t)
+            t = job.compute_next(t)
+        if since <= first or len(runs) == limit:
+            return list(runs)
+        lookback *= 4
+
+
+JobHandler = Callable[[ScheduledJob], Awaitable[None]]
+JobFilter = Callable[[ScheduledJob], bool]
+
+
+class PostScheduler:
+    """
+    One heap-based timer for every scheduled post across all guilds.
+
+    Jobs are persisted to a JSON file so restarts (e.g. Render redeploys) keep their timing.
+    Runs missed while the bot was down are handled per job via its catch-up policy:
+      - skip: drop missed runs and wait for the next future one
+      - once: fire a single catch-up run, then resume the normal schedule
+      - all:  replay every missed run (capped at MAX_CATCH_UP_RUNS)
+
+    In cluster mode each process gets its own file and an `owns` filter for the guilds on its shards.
+    `seed_path` (the single-process file) is read once when that file doesn't exist yet.
+    """
+
+    def __init__(self, handler: JobHandler, path: str = None, save_delay: float = 2.0,
+                 owns: Optional[JobFilter] = None, seed_path: str = None):
+        self.handler = handler
+        self.path = Path(path or SCHEDULER_FILE)
+        self.seed_path = Path(seed_path) if seed_path else None
+        self.owns = owns or (lambda job: True)
+        self.save_delay = save_delay
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._foreign: Dict[str, ScheduledJob] = {}  # in our file but not on our shards; kept, never fired
+        self._heap: List[tuple] = []  # (fire_at, seq, job_id, next_run) — stale entries skipped lazily
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+        self._inflight = set()  # strong refs so fire tasks aren't garbage-collected mid-run
+        self._replays: Dict[str, int] = {}  # job_id -> consecutive overdue "all" runs fired
+
+    # --- persistence ---
+    def load(self):
+        source = self.path
+        if not source.exists():
+            if self.seed_path is None or not self.seed_path.exists():
+                return
+            source = self.seed_path  # first start with a per-cluster file: take our guilds' jobs from the shared one
+        try:
+            raw = json.loads(source.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.exception("Failed to read scheduler file %s: %s", source, e)
+            return
+        for item in raw.get("jobs", []):
+            try:
+                job = ScheduledJob(**item)
+            except TypeError as e:
+                logger.warning("Skipping malformed scheduled job %s: %s", item, e)
+                continue
+            if self.owns(job):
+                self.jobs[job.job_id] = job
+            elif source == self.path:
+                self._foreign[job.job_id] = job
+        if self._foreign:
+            logger.warning("%d scheduled jobs in %s belong to guilds on other shards (did the shard layout change?); "
+                           "keeping them on disk but not running them", len(self._foreign), self.path)
+        logger.info("Loaded %d scheduled jobs from %s", len(self.jobs), source)
+
+    def _write(self, payload: str):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(payload, encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    async def save(self):
+        self._save_handle = None
+        jobs = itertools.chain(self.jobs.values(), self._foreign.values())
+        payload = json.dumps({"jobs": [asdict(j) for j in jobs]})
+        try:
+            await asyncio.to_thread(self._write, payload)
+        except Exception as e:
+            logger.exception("Failed to persist scheduled jobs: %s", e)
+
+    def _schedule_save(self):
+        # coalesce bursts of changes into one write
+        if self._save_handle is None:
+            loop = asyncio.get_running_loop()
+            self._save_handle = loop.call_later(self.save_delay, lambda: asyncio.ensure_future(self.save()))
+
+    # --- heap management ---
+    def _push(self, job: ScheduledJob):
+        if job.next_run is None:
+            return
+        fire_at = job.next_run + (random.uniform(0, job.jitter) if job.jitter > 0 else 0.0)
+        heapq.heappush(self._heap, (fire_at, next(self._seq), job.job_id, job.next_run))
+        self._wakeup.set()
+
+    def _recover(self, now: float):
+        """Apply catch-up policies to jobs whose next run passed while we were offline."""
+        for job in list(self.jobs.values()):
+            if job.next_run is None:
+                job.next_run = job.compute_next(now - 1)
+            elif job.next_run < now:
+                missed = job.next_run
+                if job.catch_up == "skip":
+                    job.next_run = job.compute_next(now)
+                elif job.catch_up == "all" and job.cron:
+                    # start from the oldest of the most recent MAX_CATCH_UP_RUNS missed runs;
+                    # _run_due then walks forward through them one at a time
+                    missed_runs = _last_runs_before(job, missed, now, MAX_CATCH_UP_RUNS)
+                    job.next_run = missed_runs[0]
+                    logger.info("Job %s missed %d run(s); replaying", job.job_id, len(missed_runs))
+                # "once" (and one-shot jobs): keep the single past next_run so it fires immediately
+            if job.next_run is None:
+                logger.info("Dropping finished job %s", job.job_id)
+                del self.jobs[job.job_id]
+                continue
+            self._push(job)
+
+    # --- public API ---
+    def start(self):
+        if self._task and not self._task.done():
+            return
+        self.load()
+        self._recover(time.time())
+        self._schedule_save()
+        self._task = asyncio.create_task(self._run(), name="post-scheduler")
+        logger.info("Post scheduler started with %d jobs.", len(self.jobs))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._save_handle:
+            self._save_handle.cancel()
+        await self.save()
+
+    def add(self, job: ScheduledJob) -> ScheduledJob:
+        if job.catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"Unknown catch-up policy {job.catch_up!r}; use one of {CATCH_UP_POLICIES}")
+        pytz.timezone(job.tz)  # raises UnknownTimeZoneError early
+        if job.cron:
+            parse_cron(job.cron)  # validate
+        job.next_run = job.compute_next(time.time())
+        if job.next_run is None:
+            raise ValueError("Job has no future run time.")
+        self.jobs[job.job_id] = job
+        self._push(job)
+        self._schedule_save()
+        return job
+
+    def remove(self, job_id: str) -> bool:
+        # heap entry is left in place and skipped when it surfaces
+        if self.jobs.pop(job_id, None) is None:
+            return False
+        self._schedule_save()
+        return True
+
+    def jobs_for_guild(self, guild_id: int) -> List[ScheduledJob]:
+        return sorted((j for j in self.jobs.values() if j.guild_id == guild_id), key=lambda j: j.next_run or 0)
+
+    # --- timer loop ---
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            delay = self._heap[0][0] - time.time() if self._heap else None
+            if delay is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self._run_due(time.time())
+
+    def _run_due(self, now: float):
+        while self._heap and self._heap[0][0] <= now:
+            _, _, job_id, scheduled = heapq.heappop(self._heap)
+            job = self.jobs.get(job_id)
+            if job is None or job.next_run != scheduled:
+                continue  # removed or rescheduled since this entry was pushed
+            job.last_run = now
+            task = asyncio.create_task(self._fire(job))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+            if job.cron:
+                nxt = job.compute_next(scheduled)
+                overdue = nxt is not None and nxt <= now
+                if overdue and job.catch_up == "all":
+                    # replay overdue runs back to back, but no more than MAX_CATCH_UP_RUNS in a row
+                    self._replays[job_id] = self._replays.get(job_id, 0) + 1
+                    overdue = self._replays[job_id] >= MAX_CATCH_UP_RUNS
+                if overdue:
+                    # never queue more than one overdue run
+                    while nxt is not None and nxt <= now:
+                        nxt = job.compute_next(nxt)
+                if nxt is None or nxt > now:
+                    self._replays.pop(job_id, None)
+                job.next_run = nxt
+                self._push(job)
+            else:
+                del self.jobs[job_id]
+            self._schedule_save()
+
+    async def _fire(self, job: ScheduledJob):
+        try:
+            await self.handler(job)
+        except Exception as e:
+            logger.exception("Scheduled job %s failed: %s", job.job_id, e)
@@ -0,0 +1,182 @@
+# utils/shared_state.py
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from utils.tracing import tracer
+
+logger = logging.getLogger("shared_state")
+
+IPC_LINE_LIMIT = 4 * 1024 * 1024  # one request per line; span uploads can exceed asyncio's 64 KiB default
+
+
+class LocalState:
+    """
+    In-process state shared by everything in one bot process: sliding-window counters and per-cluster health.
+    Used directly in single-process mode, and by the cluster launcher to back the IPC server.
+    """
+
+    def __init__(self):
+        self._windows: Dict[str, deque] = {}
+        self._health: Dict[str, dict] = {}
+
+    async def hit(self, key: str, window: float) -> int:
+        """Record one event for `key` and return how many happened in the last `window` seconds."""
+        now = time.monotonic()
+        events = self._windows.setdefault(key, deque())
+        events.append(now)
+        cutoff = now - window
+        while events and events[0] < cutoff:
+            events.popleft()
+        if len(self._windows) > 10000:
+            self._prune(now, window)
+        return len(events)
+
+    def _prune(self, now: float, window: float):
+        cutoff = now - window
+        for key in [k for k, ev in self._windows.items() if not ev or ev[-1] < cutoff]:
+            del self._windows[key]
+
+    async def report_health(self, cluster_id, snapshot: dict):
+        self._health[str(cluster_id)] = snapshot
+
+    def forget_health(self, cluster_id):
+        self._health.pop(str(cluster_id), None)
+
+    def health_snapshot(self) -> Dict[str, dict]:
+        # read from the webserver thread; return a copy so it never sees a dict being resized
+        return dict(self._health)
+
+    async def sync_traces(self, spans: list) -> Optional[float]:
+        """Store spans finished in another process; returns the trace sample rate they should use."""
+        tracer.ingest(spans)
+        return tracer.sample_rate
+
+    async def close(self):
+        pass
+
+
+class IPCServer:
+    """
+    Newline-delimited JSON server run by the cluster launcher on localhost.
+    Each bot process talks to it through IPCState, so counters and health span all clusters.
+    """
+
+    def __init__(self, state: LocalState, host: str = "127.0.0.1", port: int = 8765):
+        self.state = state
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=IPC_LINE_LIMIT)
+        logger.info("IPC server listening on %s:%d", self.host, self.port)
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    response = await self._dispatch(request)
+                except Exception as e:
+                    response = {"error": str(e)}
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request: dict) -> dict:
+        op = request.get("op")
+        if op == "hit":
+            return {"count": await self.state.hit(request["key"], float(request["window"]))}
+        if op == "health":
+            await self.state.report_health(request["cluster"], request["data"])
+            return {"ok": True}
+        if op == "health_all":
+            return {"clusters": self.state.health_snapshot()}
+        if op == "traces":
+            return {"sample_rate": await self.state.sync_traces(request["spans"])}
+        raise ValueError(f"unknown op {op!r}")
+
+
+class IPCState:
+    """
+    Client side of IPCServer with the same interface as LocalState.
+    If the launcher can't be reached, calls fall back to process-local state so moderation keeps working.
+    """
+
+    def __init__(self, host: str, port: int, timeout: float = 2.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+        self._fallback = LocalState()
+
+    async def _request(self, payload: dict) -> dict:
+        async with self._lock:
+            if self._writer is None or self._writer.is_closing():
+                self._reader, self._writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port, limit=IPC_LINE_LIMIT), timeout=self.timeout
+                )
+            try:
+                self._writer.write(json.dumps(payload).encode("utf-8") + b"\n")
+                await self._writer.drain()
+                line = await asyncio.wait_for(self._reader.readline(), timeout=self.timeout)
+            except BaseException:
+                # the stream may hold a half-read reply; start over on the next call
+                self._writer.close()
+                self._writer = None
+                raise
+            if not line:
+                self._writer.close()
+                self._writer = None
+                raise ConnectionError("IPC server closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response
+
+    async def hit(self, key: str, window: float) -> int:
+        try:
+            return (await self._request({"op": "hit", "key": key, "window": window}))["count"]
+        except Exception as e:
+            logger.warning("IPC hit failed, using local counter: %s", e)
+            return await self._fallback.hit(key, window)
+
+    async def report_health(self, cluster_id, snapshot: dict):
+        try:
+            await self._request({"op": "health", "cluster": cluster_id, "data": snapshot})
+        except Exception as e:
+            logger.debug("IPC health report failed: %s", e)
+        await self._fallback.report_health(cluster_id, snapshot)
+
+    def health_snapshot(self) -> Dict[str, dict]:
+        return self._fallback.health_snapshot()
+
+    async def sync_traces(self, spans: list) -> Optional[float]:
+        # spans are dropped if the launcher is unreachable; tracing is best-effort
+        try:
+            return (await self._request({"op": "traces", "spans": spans}))["sample_rate"]
+        except Exception as e:
+            logger.debug("IPC trace sync failed (%d spans dropped): %s", len(spans), e)
+            return None
+
+    async def close(self):
+        if self._writer:
+            self._writer.close()
+            self._writer = None
@@ -0,0 +1,265 @@
+# utils/tracing.py
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+import aiohttp
+
+logger = logging.getLogger("tracing")
+
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", 0.1))
+TRACE_BUFFER_SIZE = int(os.environ.get("TRACE_BUFFER_SIZE", 5000))  # spans kept in memory
+TRACE_FILE = os.environ.get("TRACE_FILE")  # optional JSONL export
+TRACE_SYNC_INTERVAL = float(os.environ.get("TRACE_SYNC_INTERVAL", 2))  # cluster mode: seconds between span uploads
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("lagoona_span", default=None)
+
+
+class Span:
+    """
+    One timed operation. Field names follow the OpenTelemetry span model (trace_id, span_id, parent_span_id,
+    *_unix_nano, attributes, status) so exported JSON can be converted to OTLP without reshaping.
+    """
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_span_id", "start_ns", "end_ns",
+                 "attributes", "status", "_token")
+
+    def __init__(self, tracer, name: str, trace_id: str, parent_span_id: Optional[str], attributes: dict):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_span_id = parent_span_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.status = "OK"
+        self._token = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer._export(self)
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and not issubclass(exc_type, GeneratorExit):
+            self.status = "ERROR"
+            self.attributes["error.type"] = exc_type.__name__
+        _current_span.reset(self._token)
+        self.end()
+        return False
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3) if self.end_ns else None,
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+
+
+class _NoopSpan:
+    """Returned for unsampled traces. It is still set as the current span so children stay unsampled."""
+    __slots__ = ("_token",)
+
+    def set_attribute(self, key, value):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        return False
+
+
+class Tracer:
+    """
+    Lightweight in-process tracer: spans go to an in-memory ring buffer (served by the webserver) and,
+    when TRACE_FILE is set, to a JSONL file written by a background thread. The sample rate applies
+    per trace (decided at the root span) and can be changed at runtime.
+
+    In cluster mode the bot processes forward their spans to the launcher (see `enable_forwarding`),
+    whose tracer holds the buffer and file for every cluster.
+    """
+
+    def __init__(self, sample_rate: float = TRACE_SAMPLE_RATE, buffer_size: int = TRACE_BUFFER_SIZE,
+                 path: Optional[str] = TRACE_FILE):
+        self.sample_rate = sample_rate
+        self._buffer = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()  # the webserver reads the buffer from its own thread
+        self._path = path
+        self._file_queue = None  # writer thread starts with the first exported span
+        self._outbox: Optional[deque] = None
+
+    def set_sample_rate(self, rate: float):
+        self.sample_rate = min(1.0, max(0.0, float(rate)))
+        logger.info("Trace sample rate set to %.3f", self.sample_rate)
+
+    def span(self, name: str, **attributes):
+        """Child of the current span; starts a new (sampled or not) trace when there is none."""
+        parent = _current_span.get()
+        if parent is None:
+            return self.root_span(name, **attributes)
+        return self.child(parent, name, **attributes)
+
+    def child(self, parent, name: str, **attributes):
+        """Span under an explicit parent (e.g. captured when work was queued); no-op unless parent is sampled."""
+        if not isinstance(parent, Span):
+            return _NoopSpan()
+        return Span(self, name, parent.trace_id, parent.span_id, attributes)
+
+    def root_span(self, name: str, **attributes):
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return _NoopSpan()
+        return Span(self, name, f"{random.getrandbits(128):032x}", None, attributes)
+
+    @staticmethod
+    def current():
+        return _current_span.get()
+
+    def enable_forwarding(self):
+        """Collect finished spans for `take_outbox` instead of storing them here (cluster processes)."""
+        self._outbox = deque(maxlen=self._buffer.maxlen)
+        self._path = None
+
+    def take_outbox(self, limit: int = 2000) -> list:
+        outbox = self._outbox or ()
+        return [outbox.popleft() for _ in range(min(limit, len(outbox)))]
+
+    def ingest(self, spans: list):
+        """Store spans exported by another process (the launcher receives them over IPC)."""
+        for data in spans:
+            self._store(data)
+
+    def _export(self, span: Span):
+        data = span.to_dict()
+        if self._outbox is not None:
+            self._outbox.append(data)
+        else:
+            self._store(data)
+
+    def _store(self, data: dict):
+        with self._lock:
+            self._buffer.append(data)
+            if self._path and self._file_queue is None:
+                self._file_queue = queue.SimpleQueue()
+                threading.Thread(target=self._write_file, args=(self._path,), name="trace-writer", daemon=True).start()
+        if self._file_queue is not None:
+            self._file_queue.put(data)
+
+    def _write_file(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as fh:
+            while True:
+                fh.write(json.dumps(self._file_queue.get(), default=str) + "\n")
+                if self._file_queue.empty():
+                    fh.flush()
+
+    # --- read side (webserver) ---
+    def spans(self):
+        with self._lock:
+            return list(self._buffer)
+
+    def traces(self, limit: int = 50):
+        """Most recent traces, newest first, with their overall duration."""
+        grouped = {}
+        for span in self.spans():
+            grouped.setdefault(span["trace_id"], []).append(span)
+        summaries = []
+        for trace_id, spans in grouped.items():
+            start = min(s["start_time_unix_nano"] for s in spans)
+            end = max(s["end_time_unix_nano"] for s in spans)
+            root = next((s for s in spans if s["parent_span_id"] is None), spans[0])
+            summaries.append({
+                "trace_id": trace_id,
+                "root": root["name"],
+                "start_time_unix_nano": start,
+                "duration_ms": round((end - start) / 1e6, 3),
+                "spans": len(spans),
+                "errors": sum(1 for s in spans if s["status"] != "OK"),
+            })
+        summaries.sort(key=lambda t: t["start_time_unix_nano"], reverse=True)
+        return summaries[:limit]
+
+    def trace(self, trace_id: str):
+        return sorted((s for s in self.spans() if s["trace_id"] == trace_id), key=lambda s: s["start_time_unix_nano"])
+
+
+tracer = Tracer()
+
+
+@contextlib.contextmanager
+def activate(span):
+    """Make `span` current (without ending it), e.g. to run queued work under the span that queued it."""
+    token = _current_span.set(span)
+    try:
+        yield span
+    finally:
+        _current_span.reset(token)
+
+
+def traced(name: str):
+    """Decorator: run an async function inside a child span of whatever is current."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_trace_config(trace_config: aiohttp.TraceConfig):
+    """Add a span per HTTP request made through `trace_config` (e.g. discord.py's REST calls)."""
+
+    async def on_start(session, ctx, params):
+        # only record REST calls that belong to a sampled trace
+        span = tracer.child(_current_span.get(), "http " + params.method,
+                            **{"http.method": params.method, "url.path": params.url.path})
+        if isinstance(span, Span):
+            ctx.lagoona_span = span
+
+    async def on_end(session, ctx, params):
+        span = getattr(ctx, "lagoona_span", None)
+        if span is not None:
+            span.set_attribute("http.status_code", params.response.status)
+            if params.response.status >= 400:
+                span.status = "ERROR"
+            span.end()
+
+    async def on_exception(session, ctx, params):
+        span = getattr(ctx, "lagoona_span", None)
+        if span is not None:
+            span.status = "ERROR"
+            span.set_attribute("error.type", type(params.exception).__name__)
+            span.end()
+
+    trace_config.on_request_start.append(on_start)
+    trace_config.on_request_end.append(on_end)
+    trace_config.on_request_exception.append(on_exception)
+    return trace_config
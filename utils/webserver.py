@@ -1,9 +1,12 @@
 # utils/webserver.py
 import os
+import time
 import asyncio
 from aiohttp import web
 import logging
 from pathlib import Path
+from utils.logging_setup import truncate
+from utils.tracing import tracer
 
 logger = logging.getLogger("webserver")
 
@@ -11,8 +14,22 @@ STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
 STATIC_DIR.mkdir(parents=True, exist_ok=True)
 (STATIC_DIR / "banners").mkdir(parents=True, exist_ok=True)
 
+HEALTH_STALE_AFTER = float(os.environ.get("CLUSTER_HEALTH_INTERVAL", 15)) * 3
+TRACE_ADMIN_TOKEN = os.environ.get("TRACE_ADMIN_TOKEN")  # required for /traces/sampling; guards /traces when set
+
 async def health_handler(request):
-    return web.json_response({"status": "ok", "service": "lagoona"})
+    source = request.app.get("health_source")
+    if source is None:
+        return web.json_response({"status": "ok", "service": "lagoona"})
+    # per-cluster health as last reported by each bot process
+    now = time.time()
+    clusters = {}
+    for cluster_id, snap in sorted(source().items()):
+        fresh = now - snap.get("updated", 0) <= HEALTH_STALE_AFTER
+        clusters[cluster_id] = dict(snap, status="ok" if fresh and snap.get("ready") else "degraded")
+    healthy = bool(clusters) and all(c["status"] == "ok" for c in clusters.values())
+    # always 200 so platform health checks don't kill the service while clusters are still connecting
+    return web.json_response({"status": "ok" if healthy else "degraded", "service": "lagoona", "clusters": clusters})
 
 async def ping_handler(request):
     # simple ping endpoint that UptimeRobot may hit
@@ -24,15 +41,61 @@ async def announce_receive(request):
         data = await request.json()
     except Exception:
         data = await request.post()
-    logger.info("Announcement webhook received: %s", data)
+    logger.info("Announcement webhook received: %s", truncate(data))
     return web.json_response({"received": True})
 
-def start_webserver(port: int = 8080):
+def _trace_auth(request, required: bool):
+    # traces contain message/channel ids, so reading them is gated too once a token is configured
+    if not TRACE_ADMIN_TOKEN:
+        return None if not required else web.json_response({"error": "TRACE_ADMIN_TOKEN not set"}, status=403)
+    if request.headers.get("X-Admin-Token") != TRACE_ADMIN_TOKEN:
+        return web.json_response({"error": "unauthorized"}, status=401)
+    return None
+
+async def traces_handler(request):
+    # recent traces from this process's ring buffer, newest first
+    denied = _trace_auth(request, required=False)
+    if denied:
+        return denied
+    try:
+        limit = max(1, min(500, int(request.query.get("limit", 50))))
+    except ValueError:
+        return web.json_response({"error": "limit must be an integer"}, status=400)
+    return web.json_response({"sample_rate": tracer.sample_rate, "traces": tracer.traces(limit)})
+
+async def trace_detail_handler(request):
+    denied = _trace_auth(request, required=False)
+    if denied:
+        return denied
+    spans = tracer.trace(request.match_info["trace_id"])
+    if not spans:
+        return web.json_response({"error": "trace not found"}, status=404)
+    return web.json_response({"trace_id": request.match_info["trace_id"], "spans": spans})
+
+async def trace_sampling_handler(request):
+    # change the sample rate at runtime: POST {"rate": 0.25}
+    denied = _trace_auth(request, required=True)
+    if denied:
+        return denied
+    try:
+        data = await request.json()
+        rate = float(data["rate"])
+    except Exception:
+        return web.json_response({"error": 'expected JSON body {"rate": <0..1>}'}, status=400)
+    tracer.set_sample_rate(rate)
+    return web.json_response({"sample_rate": tracer.sample_rate})
+
+def start_webserver(port: int = 8080, health_source=None):
     app = web.Application()
+    if health_source is not None:
+        app["health_source"] = health_source  # callable -> {cluster_id: snapshot}
     app.add_routes([
         web.get("/health", health_handler),
         web.get("/ping", ping_handler),
         web.post("/announce", announce_receive),
+        web.get("/traces", traces_handler),
+        web.get("/traces/{trace_id}", trace_detail_handler),
+        web.post("/traces/sampling", trace_sampling_handler),
         # static server for images under /static/
         web.static("/static", str(STATIC_DIR.resolve()), show_index=True)
     ])
@@ -47,7 +110,7 @@ def start_webserver(port: int = 8080):
         await runner.setup()
         site = web.TCPSite(runner, "0.0.0.0", port)
         await site.start()
-        logger.info(f"Webserver running on port {port}. Endpoints: /health /ping /announce /static/")
+        logger.info(f"Webserver running on port {port}. Endpoints: /health /ping /announce /traces /static/")
         while True:
             await asyncio.sleep(3600)
 